@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import os
+import sys
+from app.core.logging import setup_logging
+from app.services.countries import CountryService
+from app.services.economic_data import EconomicDataService
+from app.services.export import EXPORT_FORMATS, ExportService, ExportUnavailable
+from app.services.geo_data import GeoDataService
+
+async def export_dataset(fmt: str, output: str):
+    country_service = CountryService()
+    economic_service = EconomicDataService(country_service, GeoDataService())
+    data = await ExportService(country_service, economic_service).export(fmt)
+    # Write to a temporary file first so readers never see a partial export
+    partial = f"{output}.partial"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, output)
+    return len(data)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="African Capitals API tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write the country and indicator dataset to a file")
+    export.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    export.add_argument("--output", help="Output path (default: african-countries.<format>)")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    if args.command == "export":
+        output = args.output or f"african-countries.{EXPORT_FORMATS[args.format][1]}"
+        try:
+            size = asyncio.run(export_dataset(args.format, output))
+        except ExportUnavailable as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        print(f"Wrote {size} bytes to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
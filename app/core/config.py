@@ -1,4 +1,5 @@
 import os
+import secrets
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,12 +10,55 @@ class Settings(BaseSettings):
     
     # External API
     REST_COUNTRIES_URL: str = "https://restcountries.com/v3.1/region/africa"
+    REST_COUNTRIES_FIELDS: str = "name,cca2,cca3,capital,capitalInfo,subregion,currencies,borders"
+    # 64x48 PNG per lowercase alpha-2 code; downloaded once into the cache for the flag sprite
+    FLAG_URL: str = os.getenv("FLAG_URL", "https://flagcdn.com/64x48/{code}.png")
     
     # Cache settings
     CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # Default: 1 hour
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
     
+    # Background data refresh and update notifications
+    DATA_REFRESH_INTERVAL: int = int(os.getenv("DATA_REFRESH_INTERVAL", "3600"))  # seconds, 0 disables
+    SSE_HEARTBEAT_INTERVAL: int = int(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))  # seconds
+    
+    # Server
+    WORKERS: int = int(os.getenv("WORKERS", "4"))
+    SHARED_DATASET_NAME: str = os.getenv("SHARED_DATASET_NAME", "african-capitals")
+    
+    # Admission control, per worker process
+    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "120"))  # per client per window
+    RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
+    ADMISSION_CHEAP_CONCURRENCY: int = int(os.getenv("ADMISSION_CHEAP_CONCURRENCY", "64"))
+    ADMISSION_EXPENSIVE_CONCURRENCY: int = int(os.getenv("ADMISSION_EXPENSIVE_CONCURRENCY", "8"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))  # waiters per pool
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0"))  # seconds
+    # The /health fan-out sends this in X-Health-Check and is not rate limited. Generated at
+    # start when unset, which suits workers forked from run.py; set it when workers start
+    # separately (uvicorn --workers) so they all accept each other's probes.
+    HEALTH_CHECK_TOKEN: str = os.getenv("HEALTH_CHECK_TOKEN") or secrets.token_urlsafe(32)
+    # Proxies whose X-Forwarded-For is trusted as the client address, comma separated
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    
+    # Profiling: the X-Profile request header and /api/v1/debug/profile exist only when set
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_MAX_SECONDS: int = int(os.getenv("PROFILE_MAX_SECONDS", "30"))
+    
+    # Tracing: spans are always returned in Server-Timing; OTLP/JSON export is optional
+    OTEL_SERVICE_NAME: str = os.getenv("OTEL_SERVICE_NAME", "african-capitals-api")
+    OTEL_EXPORT_FILE: str = os.getenv("OTEL_EXPORT_FILE", "")  # JSON lines, one trace per line
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")  # e.g. http://collector:4318
+    
+    # Profile prefetching, per worker process
+    PREFETCH_TOP_N: int = int(os.getenv("PREFETCH_TOP_N", "8"))  # hottest profiles kept warm, 0 disables
+    PREFETCH_BUDGET: int = int(os.getenv("PREFETCH_BUDGET", "60"))  # upstream requests per minute
+    PREFETCH_HALF_LIFE: int = int(os.getenv("PREFETCH_HALF_LIFE", "900"))  # seconds
+    PREFETCH_INTERVAL: int = int(os.getenv("PREFETCH_INTERVAL", "60"))  # seconds
+    
+    # Event loop watchdog: stalls longer than this are logged with the blocking stack
+    LOOP_STALL_THRESHOLD: float = float(os.getenv("LOOP_STALL_THRESHOLD", "0.1"))  # seconds, 0 disables
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
@@ -24,8 +68,13 @@ class Settings(BaseSettings):
     # Region ordering
     REGION_ORDER: list = ["Northern Africa", "Western Africa", "Eastern Africa", "Southern Africa", "Central Africa"]
     
+    # Reverse geocoding
+    LOCATE_MAX_POINTS: int = int(os.getenv("LOCATE_MAX_POINTS", "10000"))
+    
     # World Bank API settings
     WORLD_BANK_API_URL: str = "https://api.worldbank.org/v2/country/{country_code}/indicator/{indicator}?format=json&per_page=1&mrnev=1"
+    WORLD_BANK_BULK_API_URL: str = "https://api.worldbank.org/v2/country/{country_codes}/indicator/{indicator}?format=json&per_page=500&mrnev=1"
+    WORLD_BANK_COUNTRIES_URL: str = "https://api.worldbank.org/v2/country?format=json&per_page=400"
 
     model_config = {
         "env_file": ".env",
@@ -1,11 +1,26 @@
+import atexit
 import logging
+import queue
 import sys
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app.core.config import settings
 
-# Configure logging
+_listener = None
+
+def stop_log_listener():
+    """Write out queued records; processes leaving through os._exit must call this first"""
+    if _listener is not None:
+        _listener.stop()
+
+atexit.register(stop_log_listener)
+
+# Configure logging. Called once at startup (run.py, the app lifespan, the CLI) rather than
+# on import, so importing the app does not create log files or start the listener thread.
 def setup_logging():
+    global _listener
+    if _listener is not None:
+        return logging.getLogger("app")
     log_level = getattr(logging, getattr(settings, "LOG_LEVEL", "INFO").upper(), logging.INFO)
     log_dir = getattr(settings, "LOG_DIR", "logs")
     log_file = getattr(settings, "LOG_FILE", "app.log")
@@ -28,17 +43,35 @@ def setup_logging():
     )
     file_handler.setFormatter(logging.Formatter(log_format))
 
-    # Root logger setup
+    # Root logger setup. Records go through a queue and are written by a listener thread,
+    # so console and file writes never block the event loop.
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # Only merge the message and its arguments here; the listener's handlers format the line
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
     logging.basicConfig(
         level=log_level,
-        handlers=[console_handler, file_handler],
+        handlers=[queue_handler],
         format=log_format,
         force=True  # Overwrite any existing handlers
     )
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    def restart_listener_in_child():
+        # The listener thread does not survive fork; give the child its own queue and thread
+        global _listener
+        child_queue = queue.SimpleQueue()
+        queue_handler.queue = child_queue
+        _listener = QueueListener(child_queue, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+
+    os.register_at_fork(after_in_child=restart_listener_in_child)
 
     logger = logging.getLogger("app")
     logger.setLevel(log_level)
     
     return logger
 
-logger = setup_logging()
\ No newline at end of file
+# Records logged before setup_logging() go to Python's last-resort handler (warnings and up)
+logger = logging.getLogger("app")
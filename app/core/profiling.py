@@ -0,0 +1,94 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from app.core.config import settings
+
+def profiling_enabled() -> bool:
+    return bool(settings.ADMIN_TOKEN)
+
+def check_admin_token(token) -> bool:
+    return profiling_enabled() and token is not None and hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a background thread and
+    counts collapsed stacks ("root;...;leaf"), the input format of flamegraph.pl and
+    speedscope. Pointed at the event loop thread, each sample shows the coroutine running
+    at that moment, or the loop's selector when it is idle.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class RequestProfiler:
+    """
+    cProfile around a single request. cProfile sees the whole thread, so work other requests
+    do on the event loop while this one awaits is included; profile on a quiet worker for a
+    clean report. Only one profile runs per process at a time.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.started = None
+
+    def start(self) -> bool:
+        if not self._active.acquire(blocking=False):
+            return False
+        try:
+            self.profile.enable()
+        except Exception:
+            # Another profiler is running in this thread; without the release no request
+            # could be profiled again until the process restarts
+            self._active.release()
+            return False
+        self.started = time.perf_counter()
+        return True
+
+    def stop(self):
+        self.profile.disable()
+        self._active.release()
+        return time.perf_counter() - self.started
+
+    def report(self, limit: int = 60) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
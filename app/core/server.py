@@ -0,0 +1,130 @@
+import asyncio
+import gc
+import os
+import signal
+import socket
+import time
+import uvicorn
+from app.core.logging import logger, stop_log_listener
+
+class PreforkServer:
+    """
+    Loads and indexes the datasets once in the parent process, then forks uvicorn workers
+    that share them copy-on-write and accept connections on one inherited socket.
+
+    uvicorn ignores `workers` when given an app object, which is why this exists.
+    `background` is an optional coroutine function run in one extra process, such as the
+    data refresher that publishes to shared memory.
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int, warmup=None, background=None,
+                 restart_delay: float = 1.0, **options):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.warmup = warmup
+        self.background = background
+        self.restart_delay = restart_delay
+        self.options = options
+        self.children = set()
+        self.background_pid = None
+        self.should_exit = False
+        self.sock = None
+
+    def _bind(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.options.get("backlog", 2048))
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                config = uvicorn.Config(self.app, host=self.host, port=self.port, **self.options)
+                uvicorn.Server(config).run(sockets=[self.sock])
+            except BaseException as e:
+                logger.error(f"Worker {os.getpid()} failed: {str(e)}")
+                exit_code = 1
+            finally:
+                stop_log_listener()
+                os._exit(exit_code)
+        self.children.add(pid)
+        logger.info(f"Started worker {pid}")
+
+    def _spawn_background(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.sock.close()
+            exit_code = 0
+            try:
+                asyncio.run(self.background())
+            except BaseException as e:
+                logger.error(f"Background process {os.getpid()} failed: {str(e)}")
+                exit_code = 1
+            finally:
+                stop_log_listener()
+                os._exit(exit_code)
+        self.children.add(pid)
+        self.background_pid = pid
+        logger.info(f"Started background process {pid}")
+
+    def _handle_exit(self, signum, frame):
+        self.should_exit = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        if self.workers <= 1 or not hasattr(os, "fork"):
+            uvicorn.run(self.app, host=self.host, port=self.port, **self.options)
+            return
+
+        if self.warmup:
+            started = time.time()
+            asyncio.run(self.warmup())
+            logger.info(f"Datasets loaded in {time.time() - started:.2f}s")
+
+        self.sock = self._bind()
+        # Move everything loaded so far out of the collector's reach, so collections in the
+        # workers do not write to (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        logger.info(f"Starting {self.workers} workers on {self.host}:{self.port}")
+        for _ in range(self.workers):
+            self._spawn()
+        if self.background:
+            self._spawn_background()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self.children.discard(pid)
+            if not self.should_exit:
+                logger.error(f"Process {pid} exited with status {status}, restarting")
+                time.sleep(self.restart_delay)
+                if self.should_exit:
+                    continue
+                if pid == self.background_pid:
+                    self._spawn_background()
+                else:
+                    self._spawn()
+
+        self.sock.close()
+        logger.info("All workers stopped")
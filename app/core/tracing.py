@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import httpx
+from starlette.responses import JSONResponse
+from app.core.config import settings
+from app.core.logging import logger
+
+# Spans of the request being handled; tasks started with asyncio.gather inherit the
+# collector, so spans from concurrent upstream calls land in the same trace
+_collector: ContextVar[Optional["TraceCollector"]] = ContextVar("trace_collector", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Spans sharing a name are reported as one entry; at most this many entries are sent
+SERVER_TIMING_MAX_ENTRIES = 20
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "start_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def _outcome(span: Span):
+    """The error, else the cache outcome (hit, miss, ...) recorded on a span"""
+    return span.attributes.get("error") or span.attributes.get("cache")
+
+class TraceCollector:
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+
+    def server_timing(self) -> str:
+        """Finished spans as a Server-Timing header value"""
+        groups = {}
+        for span in self.spans:
+            if span.end is not None:
+                groups.setdefault(span.name, []).append(span)
+        entries = []
+        for name, spans in groups.items():
+            if len(spans) == 1:
+                span = spans[0]
+                entry = f"{name};dur={span.duration_ms:.1f}"
+                outcome = _outcome(span)
+                if outcome:
+                    entry += f';desc="{outcome}"'
+            else:
+                # Concurrent calls overlap, so the slowest one is what the request waited for
+                outcomes = {}
+                for span in spans:
+                    outcome = _outcome(span)
+                    if outcome:
+                        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                desc = " ".join([f"n={len(spans)}"] + [f"{k}={v}" for k, v in outcomes.items()])
+                entry = f'{name};dur={max(s.duration_ms for s in spans):.1f};desc="{desc}"'
+            entries.append(entry)
+            if len(entries) >= SERVER_TIMING_MAX_ENTRIES:
+                break
+        return ", ".join(entries)
+
+    def to_otlp(self) -> dict:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        spans = []
+        for span in self.spans:
+            end_ns = span.start_ns + int(((span.end or span.start) - span.start) * 1e9)
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                # SERVER for the request span, INTERNAL for the rest
+                "kind": 2 if span.parent_id is None else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": [attribute(k, v) for k, v in span.attributes.items()]
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [attribute("service.name", settings.OTEL_SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}]
+            }]
+        }
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a span of the current request's trace. Outside a traced request it
+    yields a span that records nothing.
+    """
+    collector = _collector.get()
+    if collector is None:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    collector.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its encoding as a span"""
+
+    def render(self, content) -> bytes:
+        with span("encode"):
+            return super().render(content)
+
+class OTLPExporter:
+    """Writes finished traces as OTLP/JSON lines to a file and/or posts them to a collector"""
+
+    def __init__(self, file_path: str = "", endpoint: str = ""):
+        self.file_path = file_path
+        self.endpoint = endpoint.rstrip("/")
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.file_path or self.endpoint)
+
+    def export(self, collector: TraceCollector):
+        task = asyncio.create_task(self._export(collector.to_otlp()))
+        # Hold a reference until the task finishes so it is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _export(self, payload: dict):
+        try:
+            if self.file_path:
+                line = json.dumps(payload, separators=(",", ":")) + "\n"
+                await asyncio.to_thread(self._append, line)
+            if self.endpoint:
+                async with httpx.AsyncClient(timeout=settings.EXTERNAL_API_TIMEOUT) as client:
+                    response = await client.post(f"{self.endpoint}/v1/traces", json=payload)
+                    response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error exporting trace: {str(e)}")
+
+    def _append(self, line: str):
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+exporter = OTLPExporter(settings.OTEL_EXPORT_FILE, settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+
+def begin_trace():
+    """Start collecting spans for the current context; returns (collector, token for end_trace)"""
+    collector = TraceCollector()
+    return collector, _collector.set(collector)
+
+def end_trace(token):
+    _collector.reset(token)
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from app.core.config import settings
+from app.core.logging import logger
+
+class LoopWatchdog:
+    """
+    Measures event loop lag with a heartbeat coroutine and watches it from a thread.
+
+    The heartbeat wakes every `interval` seconds; how late it wakes is the loop lag. When no
+    heartbeat has run for `threshold` seconds the loop is stalled, and the thread captures
+    the loop thread's stack, which shows the code blocking it. The stall's duration is
+    recorded once the heartbeat runs again.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, history: int = 20):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.stall_seconds = 0.0
+        self.max_stall = 0.0
+        self.recent_stalls = deque(maxlen=history)
+        self._last_beat = None
+        self._pending_stack = None
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start watching the running event loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(self._thread.join)
+        self._task = None
+        self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            gap = now - self._last_beat
+            self._last_beat = now
+            self.lag = max(0.0, gap - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            if self.lag >= self.threshold:
+                self._record_stall(self.lag)
+
+    def _record_stall(self, duration: float):
+        stack, self._pending_stack = self._pending_stack, None
+        self.stall_count += 1
+        self.stall_seconds += duration
+        self.max_stall = max(self.max_stall, duration)
+        self.recent_stalls.append({
+            "at": time.time() - duration,
+            "duration_ms": round(duration * 1000, 1),
+            "stack": stack
+        })
+        logger.warning(
+            f"Event loop blocked for {duration * 1000:.0f}ms" +
+            (f" in:\n{stack}" if stack else "")
+        )
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold / 2)
+        captured_for = None
+        while not self._stop.wait(poll):
+            last_beat = self._last_beat
+            # Once per stall, take the stack while the blocking code is still running
+            overdue = time.monotonic() - last_beat - self.interval
+            if overdue >= self.threshold and captured_for != last_beat:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._pending_stack = "".join(traceback.format_stack(frame))
+                captured_for = last_beat
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stall_count,
+            "stall_seconds_total": round(self.stall_seconds, 3),
+            "max_stall_ms": round(self.max_stall * 1000, 1),
+            "recent_stalls": list(self.recent_stalls)
+        }
+
+loop_watchdog = LoopWatchdog(settings.LOOP_STALL_THRESHOLD)
@@ -3,8 +3,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.routers import capitals, health, economic_data, geo_data
+from app.routers import capitals, health, economic_data, geo_data, events, debug, export, flags
 from app.core.config import settings
+from app.core.logging import logger, setup_logging
+from app.core.profiling import profiling_enabled
+from app.core.tracing import TimedJSONResponse
+from app.core.watchdog import loop_watchdog
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.prefetch import profile_prefetcher
+from app.services.refresh import DataRefresher, SharedDatasetWatcher
+from app.services.shared_dataset import shared_dataset
+from contextlib import asynccontextmanager
 import asyncio
 import os
 from typing import Callable
@@ -12,12 +23,13 @@ import time
 
 # Custom middleware for timeout handling
 class TimeoutMiddleware:
-    def __init__(self, app: FastAPI, timeout: float = 10.0):
+    def __init__(self, app: FastAPI, timeout: float = 10.0, exempt_paths: tuple = ()):
         self.app = app
         self.timeout = timeout
+        self.exempt_paths = exempt_paths
 
     async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
             return await self.app(scope, receive, send)
         
         timeout_handler = asyncio.create_task(
@@ -35,15 +47,57 @@ class TimeoutMiddleware:
                 content={"detail": "Request timeout"}
             )(scope, receive, send)
 
+async def warm_up(app: FastAPI):
+    """Load the datasets and build their indexes and snapshots, then mark the worker ready"""
+    started = time.perf_counter()
+    try:
+        # Workers forked from run.py inherit what it already loaded, so this is mostly cache hits
+        await DataRefresher(settings.DATA_REFRESH_INTERVAL).warm()
+    except Exception as e:
+        logger.error(f"Error warming up: {str(e)}")
+    finally:
+        # Ready even when upstreams failed: requests then load the data on demand, as they would
+        # after a failed refresh, instead of the container being restarted in a loop
+        app.state.warmup_seconds = round(time.perf_counter() - started, 3)
+        app.state.ready = True
+        logger.info(f"Warm-up finished in {app.state.warmup_seconds:.2f}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # /api/v1/ready answers 503 until warm_up finishes; the server already accepts requests
+    app.state.ready = False
+    warmup_task = asyncio.create_task(warm_up(app))
+    # Background refresh publishes dataset changes to /api/v1/events subscribers. Workers
+    # reading a shared dataset leave refreshing to the process that publishes it, and watch
+    # for its new versions to tell their own subscribers.
+    refresh_task = None
+    if shared_dataset.enabled:
+        refresh_task = asyncio.create_task(SharedDatasetWatcher(shared_dataset).run())
+    elif settings.DATA_REFRESH_INTERVAL > 0:
+        refresh_task = asyncio.create_task(DataRefresher(settings.DATA_REFRESH_INTERVAL).run())
+    prefetch_task = None
+    if profile_prefetcher.enabled:
+        prefetch_task = asyncio.create_task(profile_prefetcher.run())
+    if settings.LOOP_STALL_THRESHOLD > 0:
+        loop_watchdog.start()
+    yield
+    await loop_watchdog.stop()
+    for task in (warmup_task, refresh_task, prefetch_task):
+        if task:
+            task.cancel()
+
 # Update app configuration
 app = FastAPI(
     title=settings.APP_TITLE,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
-    default_response_class=JSONResponse
+    default_response_class=TimedJSONResponse,
+    lifespan=lifespan
 )
 
-# Add middlewares
+# Add middlewares. Admission control sits inside CORS so rejections carry CORS headers.
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -52,14 +106,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(TimeoutMiddleware, timeout=60.0)
+# Event streams stay open indefinitely, so they are not subject to the request timeout
+app.add_middleware(TimeoutMiddleware, timeout=60.0, exempt_paths=("/api/v1/events",))
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+# Server-Timing covers admission queueing and the timeout as well as the route
+app.add_middleware(TracingMiddleware)
+# Profiling is opt-in; without an admin token nothing is installed
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
 
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(capitals.router, prefix="/api/v1", tags=["capitals"])
 app.include_router(economic_data.router, prefix="/api/v1", tags=["economic-data"])
 app.include_router(geo_data.router, prefix="/api/v1", tags=["geo-data"])
+app.include_router(flags.router, prefix="/api/v1", tags=["geo-data"])
+app.include_router(events.router, prefix="/api/v1", tags=["events"])
+app.include_router(export.router, prefix="/api/v1", tags=["export"])
+if profiling_enabled():
+    app.include_router(debug.router, prefix="/api/v1", tags=["debug"])
 
 # Mount static files for the WebGL frontend
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
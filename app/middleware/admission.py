@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import hmac
+import itertools
+import math
+import time
+from starlette.responses import JSONResponse
+from app.core.config import settings
+from app.core.logging import logger
+
+# Lower numbers are admitted first when a pool has a queue
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# (method or None for any, path prefix, pool, priority); first match wins. Cached reads go
+# to the cheap pool, upstream fan-outs to the expensive one. /health fans out to the other
+# routes over HTTP, so it has a pool of its own rather than holding slots they need.
+ROUTE_CLASSES = [
+    (None, "/api/v1/events", None, None),
+    (None, "/api/v1/health/loop", "cheap", PRIORITY_HIGH),
+    (None, "/api/v1/ready", "cheap", PRIORITY_HIGH),
+    (None, "/api/v1/health", "health", PRIORITY_LOW),
+    (None, "/api/v1/economic-data/", "expensive", PRIORITY_HIGH),
+    (None, "/api/v1/country-profile/", "expensive", PRIORITY_NORMAL),
+    (None, "/api/v1/economic-data", "expensive", PRIORITY_LOW),
+    ("POST", "/api/v1/locate", "expensive", PRIORITY_NORMAL),
+    (None, "/api/v1/export/", "expensive", PRIORITY_LOW),
+    (None, "/api/v1/", "cheap", PRIORITY_NORMAL),
+    (None, "/", "cheap", PRIORITY_HIGH),
+]
+
+def classify(method: str, path: str):
+    """The (pool, priority) for a request, or (None, None) when it bypasses admission control"""
+    for route_method, prefix, pool, priority in ROUTE_CLASSES:
+        if (route_method is None or route_method == method) and path.startswith(prefix):
+            return pool, priority
+    return None, None
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 on success, else the seconds until they are available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class RateLimiter:
+    """Per-client token buckets; idle (refilled) buckets are dropped once there are too many"""
+
+    def __init__(self, requests: int, window: int, max_clients: int = 10000):
+        self.rate = requests / window
+        self.burst = requests
+        self.max_clients = max_clients
+        self.buckets = {}
+
+    def take(self, client: str, cost: float = 1.0):
+        """Returns (retry_after_seconds, remaining_tokens)"""
+        now = time.monotonic()
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst, now)
+        return bucket.take(now, cost), int(bucket.tokens)
+
+    def _prune(self, now: float):
+        self.buckets = {
+            client: bucket for client, bucket in self.buckets.items()
+            if not bucket.is_full(now)
+        }
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+class ConcurrencyPool:
+    """
+    At most `limit` requests run at once; the rest wait in a bounded priority queue and are
+    shed when it is full or when they would wait longer than `max_wait` seconds.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._queue = []
+        self._counter = itertools.count()
+        # Moving average of time in the pool, used for Retry-After
+        self._service_time = 0.1
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def retry_after(self) -> float:
+        return max(1.0, self._service_time * (len(self._queue) + 1) / self.limit)
+
+    async def acquire(self, priority: int):
+        if self.active < self.limit and not self._queue:
+            self.active += 1
+            return
+        if len(self._queue) >= self.queue_size:
+            # Make room by shedding the lowest-priority, newest waiter if this one outranks it
+            worst = max(self._queue)
+            if worst[0] <= priority:
+                raise Overloaded(self.retry_after())
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            worst[2].set_exception(Overloaded(self.retry_after()))
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), waiter)
+        heapq.heappush(self._queue, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.exception():
+                # Granted at the deadline; keep the slot
+                return
+            self._discard(entry)
+            raise Overloaded(self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and not waiter.exception():
+                self.release()
+            else:
+                self._discard(entry)
+            raise
+
+    def _discard(self, entry):
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+
+    def release(self, elapsed: float = None):
+        if elapsed is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                # The slot passes straight to the waiter, so `active` is unchanged
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+class AdmissionMiddleware:
+    """
+    Rate limits each client with a token bucket, then admits the request through the
+    concurrency pool for its route class. Rejections are 429 (client over its rate) or 503
+    (server overloaded), both with Retry-After. State is per worker process.
+    """
+
+    def __init__(self, app, pools: dict = None, rate_limiter: RateLimiter = None, health_check_token: str = None):
+        self.app = app
+        self.health_check_token = (health_check_token or settings.HEALTH_CHECK_TOKEN).encode("latin-1")
+        self.pools = pools or {
+            "cheap": ConcurrencyPool(
+                "cheap", settings.ADMISSION_CHEAP_CONCURRENCY,
+                settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT
+            ),
+            "expensive": ConcurrencyPool(
+                "expensive", settings.ADMISSION_EXPENSIVE_CONCURRENCY,
+                settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT
+            ),
+            "health": ConcurrencyPool("health", 1, 4, settings.ADMISSION_QUEUE_TIMEOUT),
+        }
+        self.rate_limiter = rate_limiter or RateLimiter(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
+        self.rate_limit_header = f"{settings.RATE_LIMIT_REQUESTS};w={settings.RATE_LIMIT_WINDOW}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        pool_name, priority = classify(scope["method"], scope["path"])
+        if pool_name is None:
+            return await self.app(scope, receive, send)
+
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+        headers = [(b"x-rate-limit", self.rate_limit_header.encode("latin-1"))]
+        # Requests the server makes to itself (the /health fan-out) are not rate limited. They
+        # are recognised by a secret header, not by address, since the client address may come
+        # from X-Forwarded-For; handlers see the mark as request.state.health_check.
+        if self._is_health_check(scope):
+            scope.setdefault("state", {})["health_check"] = True
+        else:
+            retry_after, remaining = self.rate_limiter.take(client_host)
+            headers.append((b"x-rate-limit-remaining", str(remaining).encode("latin-1")))
+            if retry_after:
+                return await self._reject(scope, receive, send, 429, "Rate limit exceeded", retry_after, headers)
+
+        pool = self.pools[pool_name]
+        try:
+            await pool.acquire(priority)
+        except Overloaded as e:
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: {pool.name} pool overloaded")
+            return await self._reject(scope, receive, send, 503, "Server overloaded", e.retry_after, headers)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + headers
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            pool.release(time.monotonic() - started)
+
+    def _is_health_check(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-health-check":
+                return hmac.compare_digest(value, self.health_check_token)
+        return False
+
+    async def _reject(self, scope, receive, send, status_code, detail, retry_after, headers):
+        response = JSONResponse(status_code=status_code, content={"detail": detail})
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+        for name, value in headers:
+            response.headers[name.decode("latin-1")] = value.decode("latin-1")
+        await response(scope, receive, send)
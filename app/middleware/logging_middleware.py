@@ -24,8 +24,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             process_time = time.time() - start_time
             response.headers.update({
                 "X-Request-ID": request_id,
-                "X-Process-Time": f"{process_time:.3f}",
-                "X-Rate-Limit": "60;w=60"  # Basic rate limiting info
+                "X-Process-Time": f"{process_time:.3f}"
             })
             
             return response
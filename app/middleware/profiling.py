@@ -0,0 +1,45 @@
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, PlainTextResponse
+from app.core.logging import logger
+from app.core.profiling import RequestProfiler, check_admin_token
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with `X-Profile: <admin token>` and answers with the cProfile
+    report instead of the response body; the original status is in `X-Profiled-Status`.
+    Only installed when ADMIN_TOKEN is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = Headers(scope=scope).get("x-profile")
+        if token is None:
+            return await self.app(scope, receive, send)
+        if not check_admin_token(token):
+            return await JSONResponse(status_code=403, content={"detail": "Invalid admin token"})(scope, receive, send)
+
+        profiler = RequestProfiler()
+        if not profiler.start():
+            return await JSONResponse(status_code=409, content={"detail": "A profile is already running"})(scope, receive, send)
+
+        status = {"code": None}
+
+        async def discard(message):
+            # The report replaces the response, so only its status is kept
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            elapsed = profiler.stop()
+        logger.info(f"Profiled {scope['method']} {scope['path']} in {elapsed:.3f}s")
+        response = PlainTextResponse(profiler.report(), headers={
+            "X-Profiled-Status": str(status["code"]),
+            "X-Profiled-Time": f"{elapsed:.3f}"
+        })
+        await response(scope, receive, send)
@@ -0,0 +1,36 @@
+from app.core.tracing import begin_trace, end_trace, exporter, span
+
+class TracingMiddleware:
+    """
+    Collects the spans of each request, returns them in a Server-Timing header and, when
+    configured, exports the trace in OpenTelemetry format.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        collector, token = begin_trace()
+        try:
+            with span("request", **{"http.method": scope["method"], "http.target": scope["path"]}) as root:
+                async def send_with_timing(message):
+                    if message["type"] == "http.response.start":
+                        root.set(**{"http.status_code": message["status"]})
+                        # The request span is still open, so it is reported separately as "app"
+                        timing = f"app;dur={root.duration_ms:.1f}"
+                        spans = collector.server_timing()
+                        if spans:
+                            timing += f", {spans}"
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"server-timing", timing.encode("latin-1"))
+                        ]
+                    await send(message)
+
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+        if exporter.enabled:
+            exporter.export(collector)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from app.services.countries import CountryService
 from app.core.logging import logger
+from array import array
+import json
+import sys
 
 router = APIRouter()
 
@@ -45,4 +48,113 @@ async def get_african_capitals(country_service: CountryService = Depends()):
         raise HTTPException(
             status_code=503,
             detail="Unable to fetch country data. Service may be temporarily unavailable."
-        )
\ No newline at end of file
+        )
+
+@router.get("/african-capitals/nearest",
+    summary="Get the capitals nearest to a coordinate",
+    responses={
+        200: {
+            "description": "Nearest capitals ordered by great-circle distance",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "nearest_capitals": [
+                            {"code": "KE", "country": "Kenya", "capital": "Nairobi", "lat": -1.28, "lon": 36.82, "distance_km": 12.4}
+                        ]
+                    }
+                }
+            }
+        },
+        503: {
+            "description": "Service temporarily unavailable"
+        }
+    }
+)
+async def get_nearest_capitals(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
+    k: int = Query(1, ge=1, le=60, description="Number of capitals to return"),
+    country_service: CountryService = Depends()
+):
+    """
+    Returns the k African capitals closest to the given coordinate.
+    """
+    try:
+        index = await country_service.get_capital_index()
+    except Exception as e:
+        logger.error(f"Error finding nearest capitals: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to fetch country data. Service may be temporarily unavailable."
+        )
+    return {
+        "nearest_capitals": [
+            {**capital, "distance_km": round(distance, 1)}
+            for capital, distance in index.nearest(lat, lon, k)
+        ]
+    }
+
+@router.get("/african-capitals/distances",
+    summary="Get the great-circle distance matrix between African capitals",
+    responses={
+        200: {
+            "description": "Distances in km; row and column order follows `codes`",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "version": 4,
+                        "unit": "km",
+                        "codes": ["EG", "KE"],
+                        "matrix": [[0.0, 3530.2], [3530.2, 0.0]]
+                    }
+                },
+                "application/octet-stream": {
+                    "example": "Little-endian float32 row-major matrix; codes in the X-Capital-Codes header"
+                }
+            }
+        },
+        503: {
+            "description": "Service temporarily unavailable"
+        }
+    }
+)
+async def get_capital_distances(
+    request: Request,
+    format: str = Query("json", pattern="^(json|binary)$", description="json, or binary float32"),
+    country_service: CountryService = Depends()
+):
+    """
+    Returns the haversine distance matrix between capitals, computed once per dataset version.
+    """
+    try:
+        index = await country_service.get_capital_index()
+    except Exception as e:
+        logger.error(f"Error fetching capital distances: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to fetch country data. Service may be temporarily unavailable."
+        )
+
+    etag = f'"capitals-{index.digest}-{format}"'
+    headers = {"ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if format == "binary":
+        matrix = index.distance_matrix()
+        if sys.byteorder != "little":
+            matrix = array("f", matrix)
+            matrix.byteswap()
+        headers["X-Capital-Codes"] = ",".join(index.codes)
+        return Response(content=matrix.tobytes(), media_type="application/octet-stream", headers=headers)
+
+    return Response(
+        content=json.dumps({
+            "version": index.version,
+            "unit": "km",
+            "codes": index.codes,
+            "matrix": index.distance_rows()
+        }, separators=(",", ":")),
+        media_type="application/json",
+        headers=headers
+    )
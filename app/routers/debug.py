@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.profiling import StackSampler, check_admin_token
+
+router = APIRouter()
+
+# One sampling session per worker at a time
+_sampling = False
+
+@router.get("/debug/profile",
+    summary="Sample the event loop and return collapsed stacks for a flamegraph",
+    response_class=PlainTextResponse,
+    responses={
+        200: {
+            "description": "One collapsed stack per line, with its sample count",
+            "content": {
+                "text/plain": {
+                    "example": "run (runners.py:86);...;get_all_economic_data (economic_data.py:412) 37\n"
+                }
+            }
+        },
+        403: {"description": "Missing or invalid admin token"},
+        409: {"description": "A sampling session is already running"}
+    }
+)
+async def profile_event_loop(
+    seconds: float = Query(10, gt=0, description="Sampling duration in seconds"),
+    interval: float = Query(0.005, ge=0.001, le=0.1, description="Seconds between samples"),
+    x_admin_token: str = Header(None)
+):
+    """
+    Samples this worker's event loop thread for `seconds` while it keeps serving requests.
+    Render the output with flamegraph.pl or load it in speedscope.
+    """
+    global _sampling
+    if not check_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILE_MAX_SECONDS}")
+    if _sampling:
+        raise HTTPException(status_code=409, detail="A sampling session is already running")
+
+    _sampling = True
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(sampler.stop)
+        _sampling = False
+    logger.info(f"Collected {sampler.samples} event loop samples over {seconds}s")
+    return PlainTextResponse(sampler.collapsed(), headers={
+        "Content-Disposition": 'attachment; filename="event-loop.collapsed"'
+    })
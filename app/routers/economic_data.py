@@ -1,27 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends, Path, Query
-from app.services.economic_data import EconomicDataService
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Request, Response
+from app.services.economic_data import (
+    EconomicDataService, PROFILE_FIELD_SOURCES, SUMMARY_FIELD_SOURCES, parse_fields
+)
 from app.core.logging import logger
+from app.services.prefetch import profile_prefetcher
 from typing import Optional
 
 router = APIRouter()
 
+async def record_profile_request(request: Request, economic_service: EconomicDataService, country_code: str):
+    # Probes from the /health fan-out are not client interest, so they do not make profiles hot
+    if getattr(request.state, "health_check", False):
+        return
+    # Counted under the alpha-2 code the caches use, however the path spelled it
+    country = await economic_service.country_service.get_country_data(country_code)
+    if country:
+        profile_prefetcher.record(country.code)
+
+def get_fields(value, available):
+    try:
+        return parse_fields(value, available)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/economic-data", summary="Get economic data for African countries")
 async def get_economic_data(
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. name,gdp"),
+    region: Optional[str] = Query(None, description="Only countries in this region, e.g. Eastern Africa"),
+    sort: Optional[str] = Query(None, pattern="^(gdp|population|gdp_growth)$", description="Sort by this column; countries without a value come last"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort direction"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Maximum number of countries to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     economic_service: EconomicDataService = Depends()
 ):
     """
-    Fetches economic data for African countries including GDP, population, and key sectors.
+    Fetches economic data for African countries including GDP, population and growth.
+    Results can be filtered by region, sorted and paged; each query reads a precomputed
+    index that is rebuilt only when the data changes.
     """
     logger.info("Fetching economic data for African countries")
+    fields = get_fields(fields, SUMMARY_FIELD_SOURCES)
     try:
-        result = await economic_service.get_all_economic_data()
-        return {"economic_data": result}
+        result = await economic_service.get_all_economic_data(fields, region, sort, order, limit, cursor)
+    except ValueError as e:
+        # Unknown region or an invalid or expired cursor
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching economic data: {str(e)}")
         raise HTTPException(
             status_code=503,
             detail="Unable to fetch economic data. Service may be temporarily unavailable."
         )
+    if isinstance(result, bytes):
+        # Pre-serialized page for the default fields
+        return Response(content=result, media_type="application/json")
+    return result
 
 @router.get("/economic-data/{country_code}",
     summary="Get economic data for a specific African country",
@@ -56,25 +89,29 @@ async def get_economic_data(
     }
 )
 async def get_country_economic_data(
+    request: Request,
     country_code: str = Path(..., description="ISO 3166-1 alpha-2 or alpha-3 country code"),
-    healthcheck: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. economy.gdp,demographics"),
+    healthcheck: bool = Query(False, deprecated=True, description="Use fields=economy.gdp instead"),
     economic_service: EconomicDataService = Depends()
 ):
     """
     Fetches economic data for a specific African country including GDP, population, and key sectors.
+    Only the upstream data needed for the requested `fields` is fetched; unknown countries
+    are 404 whichever fields are requested.
     """
     logger.info(f"Fetching economic data for country: {country_code}")
+    fields = ["economy.gdp"] if healthcheck else get_fields(fields, PROFILE_FIELD_SOURCES)
     try:
-        if healthcheck:
-            # Only fetch GDP for health check
-            gdp = await economic_service.fetch_world_bank_data(country_code, economic_service.indicators["gdp"])
-            return {"gdp": gdp}
-        result = await economic_service.get_country_economic_data(country_code)
+        result = await economic_service.get_country_economic_data(country_code, fields)
         if not result:
             raise HTTPException(
                 status_code=404,
                 detail=f"Economic data not found for country code: {country_code}"
             )
+        await record_profile_request(request, economic_service, country_code)
+        if healthcheck:
+            return {"gdp": result["economy"]["gdp"]}
         return result
     except HTTPException:
         raise
@@ -87,22 +124,29 @@ async def get_country_economic_data(
 
 @router.get("/country-profile/{country_code}", summary="Get comprehensive profile for a specific African country")
 async def get_country_profile(
+    request: Request,
     country_code: str = Path(..., description="ISO 3166-1 alpha-2 or alpha-3 country code"),
-    healthcheck: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. economy.gdp,demographics"),
+    healthcheck: bool = Query(False, deprecated=True, description="Use fields=economy.gdp instead"),
     economic_service: EconomicDataService = Depends()
 ):
+    """
+    Fetches a comprehensive profile for a specific African country.
+    Only the upstream data needed for the requested `fields` is fetched; unknown countries
+    are 404 whichever fields are requested.
+    """
     logger.info(f"Fetching country profile for: {country_code}")
+    fields = ["economy.gdp"] if healthcheck else get_fields(fields, PROFILE_FIELD_SOURCES)
     try:
-        if healthcheck:
-            # Only fetch GDP for health check
-            gdp = await economic_service.fetch_world_bank_data(country_code, economic_service.indicators["gdp"])
-            return {"gdp": gdp}
-        result = await economic_service.get_country_profile(country_code)
+        result = await economic_service.get_country_profile(country_code, fields)
         if not result:
             raise HTTPException(
                 status_code=404,
                 detail=f"Country profile not found for country code: {country_code}"
             )
+        await record_profile_request(request, economic_service, country_code)
+        if healthcheck:
+            return {"gdp": result["economy"]["gdp"]}
         return result
     except HTTPException:
         raise
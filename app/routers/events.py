@@ -0,0 +1,65 @@
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.data_events import data_events
+
+router = APIRouter()
+
+def format_sse(event: str, data: dict, event_id=None) -> str:
+    """Encode a server-sent event frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/data-version",
+    summary="Get the current version of the cached datasets",
+    responses={
+        200: {
+            "description": "Current dataset versions",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "version": 3,
+                        "updated_at": 1718000000.0,
+                        "datasets": {"countries": 1, "geometry": 2, "indicators": 3}
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_data_version():
+    """
+    Returns the global data version and the version at which each dataset last changed.
+    """
+    return data_events.snapshot()
+
+@router.get("/events", summary="Stream data update notifications as server-sent events")
+async def stream_data_events(request: Request):
+    """
+    Sends a `version` event on connect, then an `update` event listing the changed keys
+    whenever the countries, indicators or geometry data change.
+    """
+    logger.info("Data event subscriber connected")
+
+    async def event_stream():
+        yield format_sse("version", data_events.snapshot(), event_id=data_events.version)
+        async for event in data_events.listen(heartbeat=settings.SSE_HEARTBEAT_INTERVAL):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event["type"], event, event_id=event["version"])
+        logger.info("Data event subscriber disconnected")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
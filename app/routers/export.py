@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import Response
+from app.core.logging import logger
+from app.services.export import EXPORT_FORMATS, ExportService, ExportUnavailable
+
+router = APIRouter()
+
+@router.get("/export/countries.{fmt}",
+    summary="Export countries, capitals, regions and World Bank indicators as Arrow or Parquet",
+    response_class=Response,
+    responses={
+        200: {
+            "description": "One row per African country",
+            "content": {media_type: {} for media_type, _ in EXPORT_FORMATS.values()}
+        },
+        503: {"description": "Export unavailable (pyarrow not installed or upstream data unavailable)"}
+    }
+)
+async def export_countries(
+    fmt: str = Path(..., pattern="^(arrow|parquet)$", description="arrow (IPC stream) or parquet"),
+    export_service: ExportService = Depends()
+):
+    """
+    Returns the joined country dataset with typed columns: code, code3, name, capital,
+    region, capital_lat, capital_lon, currency and one float64 column per indicator.
+    """
+    media_type, extension = EXPORT_FORMATS[fmt]
+    try:
+        data = await export_service.export(fmt)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting countries as {fmt}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to export country data. Service may be temporarily unavailable."
+        )
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="african-countries.{extension}"'}
+    )
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
+from app.services.flags import FlagSpriteService
+from app.core.logging import logger
+
+router = APIRouter()
+
+@router.get("/flags/manifest.json",
+    summary="Offsets of each country's flag in the flag sprite",
+    responses={
+        200: {
+            "description": "Sprite version, size and the top-left corner of each flag",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "version": "3f2a9c0d41b7e6a5",
+                        "width": 640,
+                        "height": 288,
+                        "flag_width": 64,
+                        "flag_height": 48,
+                        "flags": {"KE": [128, 96], "NG": [384, 144]}
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_flag_manifest(request: Request, flag_service: FlagSpriteService = Depends()):
+    """
+    Returns where each flag sits in /flags/sprite.svg. Countries without a flag are absent.
+    Revalidates with its ETag.
+    """
+    try:
+        sprite = await flag_service.get_sprite()
+    except Exception as e:
+        logger.error(f"Error building flag sprite: {str(e)}")
+        raise HTTPException(status_code=503, detail="Flags are temporarily unavailable")
+    headers = {"ETag": f'"{sprite.version}"', "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=sprite.manifest, headers=headers)
+
+@router.get("/flags/sprite.svg", summary="Every country's flag in one SVG sprite sheet")
+async def get_flag_sprite(
+    request: Request,
+    v: str = Query(None, description="Sprite version from the manifest; versioned URLs are cached for a year"),
+    flag_service: FlagSpriteService = Depends()
+):
+    """
+    Returns the flag sprite sheet. Requested with the manifest's version, the response is
+    immutable; otherwise it revalidates with its ETag.
+    """
+    try:
+        sprite = await flag_service.get_sprite()
+    except Exception as e:
+        logger.error(f"Error building flag sprite: {str(e)}")
+        raise HTTPException(status_code=503, detail="Flags are temporarily unavailable")
+    headers = {
+        "ETag": f'"{sprite.version}"',
+        "Cache-Control": "public, max-age=31536000, immutable" if v == sprite.version else "no-cache"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=sprite.svg, media_type="image/svg+xml", headers=headers)
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Path
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Request, Response
+from pydantic import BaseModel
+from typing import List, Tuple
 from app.services.geo_data import GeoDataService
+from app.core.config import settings
 from app.core.logging import logger
 
 router = APIRouter()
 
+class LocateRequest(BaseModel):
+    points: List[Tuple[float, float]]
+
 @router.get("/map-data",
     summary="Get GeoJSON data for African countries",
     responses={
@@ -30,14 +36,18 @@ router = APIRouter()
         }
     }
 )
-async def get_map_data(geo_service: GeoDataService = Depends()):
+async def get_map_data(request: Request, geo_service: GeoDataService = Depends()):
     """
     Fetches GeoJSON data for all African countries for map rendering.
+    The response is serialized once per GeoJSON version and revalidates with its ETag.
     """
     logger.info("Fetching map data for African countries")
     try:
-        result = await geo_service.get_all_countries_geojson()
-        return result
+        digest, snapshot = await geo_service.get_map_data_snapshot()
+        headers = {"ETag": f'"{digest}"'} if digest else {}
+        if digest and request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=snapshot, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error fetching map data: {str(e)}")
         raise HTTPException(
@@ -69,4 +79,89 @@ async def get_country_map_data(
         raise HTTPException(
             status_code=503,
             detail="Unable to fetch map data. Service may be temporarily unavailable."
-        )
\ No newline at end of file
+        )
+
+@router.get("/locate",
+    summary="Find the African country containing a point",
+    responses={
+        200: {
+            "description": "Country containing the point",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "lat": -1.29,
+                        "lon": 36.82,
+                        "country": {"code": "KE", "iso_a3": "KEN", "name": "Kenya"}
+                    }
+                }
+            }
+        },
+        404: {
+            "description": "The point is not inside an African country"
+        }
+    }
+)
+async def locate_point(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
+    geo_service: GeoDataService = Depends()
+):
+    """
+    Reverse-geocodes a single coordinate to the African country that contains it.
+    """
+    try:
+        country = await geo_service.locate(lat, lon)
+    except Exception as e:
+        logger.error(f"Error locating point ({lat}, {lon}): {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to locate point. Service may be temporarily unavailable."
+        )
+    if not country:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No African country found at lat={lat}, lon={lon}"
+        )
+    return {"lat": lat, "lon": lon, "country": country}
+
+@router.post("/locate",
+    summary="Find the African countries containing a batch of points",
+    responses={
+        200: {
+            "description": "Country code for each point, in request order",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "results": ["KE", None, "NG"],
+                        "countries": {"KE": "Kenya", "NG": "Nigeria"}
+                    }
+                }
+            }
+        },
+        413: {
+            "description": "Too many points in one request"
+        }
+    }
+)
+async def locate_points(
+    request: LocateRequest,
+    geo_service: GeoDataService = Depends()
+):
+    """
+    Reverse-geocodes a batch of [lat, lon] pairs. Points outside African countries map to null.
+    """
+    if len(request.points) > settings.LOCATE_MAX_POINTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.LOCATE_MAX_POINTS} points can be located per request"
+        )
+    logger.info(f"Locating {len(request.points)} points")
+    try:
+        codes, countries = await geo_service.locate_many(request.points)
+    except Exception as e:
+        logger.error(f"Error locating points: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Unable to locate points. Service may be temporarily unavailable."
+        )
+    return {"results": codes, "countries": countries}
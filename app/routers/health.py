@@ -1,12 +1,14 @@
 import os
 import time
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import datetime
 from typing import Dict, Any
 from app.services.dependencies import get_timezone
+from app.core.config import settings
 from app.core.logging import logger
+from app.core.watchdog import loop_watchdog
+from app.services.prefetch import profile_prefetcher
 from http import HTTPStatus
-from aiohttp import ClientSession, ClientTimeout, ClientError, TCPConnector
 import asyncio
 import traceback
 
@@ -16,19 +18,19 @@ router = APIRouter()
 MONITORED_ENDPOINTS = [
     {"path": "/api/v1/african-capitals", "name": "African Capitals", "expected_status": 200},
     # Economic data endpoints
-    {"path": "/api/v1/economic-data/KE?healthcheck=true", "name": "Economic Data (Kenya)", "expected_status": 200},
-    {"path": "/api/v1/economic-data/NG?healthcheck=true", "name": "Economic Data (Nigeria)", "expected_status": 200},
-    {"path": "/api/v1/economic-data/ZA?healthcheck=true", "name": "Economic Data (South Africa)", "expected_status": 200},
-    {"path": "/api/v1/economic-data/EG?healthcheck=true", "name": "Economic Data (Egypt)", "expected_status": 200},
+    {"path": "/api/v1/economic-data/KE?fields=economy.gdp", "name": "Economic Data (Kenya)", "expected_status": 200},
+    {"path": "/api/v1/economic-data/NG?fields=economy.gdp", "name": "Economic Data (Nigeria)", "expected_status": 200},
+    {"path": "/api/v1/economic-data/ZA?fields=economy.gdp", "name": "Economic Data (South Africa)", "expected_status": 200},
+    {"path": "/api/v1/economic-data/EG?fields=economy.gdp", "name": "Economic Data (Egypt)", "expected_status": 200},
     # Map data endpoints
     {"path": "/api/v1/map-data/KE", "name": "Map Data (Kenya)", "expected_status": 200},
     {"path": "/api/v1/map-data/NG", "name": "Map Data (Nigeria)", "expected_status": 200},
     {"path": "/api/v1/map-data/ZA", "name": "Map Data (South Africa)", "expected_status": 200},
     # Country profile endpoints
-    {"path": "/api/v1/country-profile/KE?healthcheck=true", "name": "Country Profile (Kenya)", "expected_status": 200},
-    {"path": "/api/v1/country-profile/NG?healthcheck=true", "name": "Country Profile (Nigeria)", "expected_status": 200},
-    {"path": "/api/v1/country-profile/ZA?healthcheck=true", "name": "Country Profile (South Africa)", "expected_status": 200},
-    {"path": "/api/v1/country-profile/EG?healthcheck=true", "name": "Country Profile (Egypt)", "expected_status": 200},
+    {"path": "/api/v1/country-profile/KE?fields=economy.gdp", "name": "Country Profile (Kenya)", "expected_status": 200},
+    {"path": "/api/v1/country-profile/NG?fields=economy.gdp", "name": "Country Profile (Nigeria)", "expected_status": 200},
+    {"path": "/api/v1/country-profile/ZA?fields=economy.gdp", "name": "Country Profile (South Africa)", "expected_status": 200},
+    {"path": "/api/v1/country-profile/EG?fields=economy.gdp", "name": "Country Profile (Egypt)", "expected_status": 200},
     # Frontend
     {"path": "/", "name": "WebGL Map Interface", "expected_status": 200}
 ]
@@ -50,6 +52,7 @@ def get_timeout_for_endpoint(path):
 
 async def check_endpoint(session, path: str, name: str, expected_status: int) -> Dict[str, Any]:
     """Check health of a single endpoint with improved timeout handling."""
+    from aiohttp import ClientTimeout
     start_time = time.time()
     try:
         url = f"{BASE_URL}{path}"
@@ -177,7 +180,9 @@ async def health_check(tz=Depends(get_timezone)) -> Dict[str, Any]:
         "healthy_endpoints": 0,
         "degraded_endpoints": 0
     }
-    
+
+    # aiohttp is only used by this check, so it is imported here rather than at startup
+    from aiohttp import ClientSession, ClientTimeout, TCPConnector
     connector = TCPConnector(
         limit=MAX_CONCURRENT,
         limit_per_host=2,
@@ -188,7 +193,8 @@ async def health_check(tz=Depends(get_timezone)) -> Dict[str, Any]:
     async with ClientSession(
         connector=connector,
         timeout=timeout,
-        headers={"Connection": "close"}
+        # Marks the probes as internal, so they are not rate limited or counted as client traffic
+        headers={"Connection": "close", "X-Health-Check": settings.HEALTH_CHECK_TOKEN}
     ) as session:
         results = await process_endpoints(session, MONITORED_ENDPOINTS)
         for result in results:
@@ -199,4 +205,63 @@ async def health_check(tz=Depends(get_timezone)) -> Dict[str, Any]:
                 health_data["degraded_endpoints"] += 1
     
     health_data["status"] = "ok" if health_data["degraded_endpoints"] == 0 else "degraded"
-    return health_data
\ No newline at end of file
+    health_data["prefetch"] = profile_prefetcher.stats()
+    loop_stats = loop_watchdog.stats()
+    health_data["event_loop"] = {
+        key: loop_stats[key] for key in ("lag_ms", "stalls", "max_stall_ms")
+    }
+    return health_data
+
+@router.get(
+    "/health/loop",
+    summary="Event loop lag and stalls of this worker",
+    responses={
+        200: {
+            "description": "Loop lag and the stalls recorded since the worker started",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "threshold_ms": 100.0,
+                        "lag_ms": 0.4,
+                        "max_lag_ms": 212.7,
+                        "stalls": 1,
+                        "stall_seconds_total": 0.213,
+                        "max_stall_ms": 212.7,
+                        "recent_stalls": [{
+                            "at": 1718000000.0,
+                            "duration_ms": 212.7,
+                            "stack": "  File \"app/services/geo_data.py\", line 47, in _load_cache_file\n..."
+                        }]
+                    }
+                }
+            }
+        }
+    }
+)
+async def loop_health() -> Dict[str, Any]:
+    """
+    Returns the event loop lag and recent stalls with the stack that blocked the loop.
+    """
+    return loop_watchdog.stats()
+
+
+@router.get(
+    "/ready",
+    summary="Readiness of this worker to take traffic",
+    responses={
+        200: {
+            "description": "Warm-up has finished",
+            "content": {"application/json": {"example": {"ready": True, "warmup_seconds": 1.84}}}
+        },
+        503: {"description": "The worker is still loading its datasets"}
+    }
+)
+async def readiness(request: Request) -> Dict[str, Any]:
+    """
+    Returns 200 once the worker has loaded its datasets and built their indexes and
+    snapshots, 503 until then.
+    """
+    state = request.app.state
+    if not getattr(state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"ready": True, "warmup_seconds": state.warmup_seconds}
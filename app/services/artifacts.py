@@ -0,0 +1,36 @@
+class DerivedArtifacts:
+    """
+    Caches values derived from the upstream datasets (groupings, indexes, serialized
+    snapshots). Each artifact is rebuilt only when the digest of its input changes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, name: str, digest: str, build):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+        value = build()
+        self._entries[name] = (digest, value)
+        return value
+
+    def lookup(self, name: str, digest: str):
+        """The artifact if it was built from `digest`, else None"""
+        entry = self._entries.get(name)
+        return entry[1] if entry is not None and entry[0] == digest else None
+
+    def digest(self, name: str):
+        """Input digest the artifact was last built from, or None"""
+        entry = self._entries.get(name)
+        return entry[0] if entry else None
+
+    def discard(self, *names: str):
+        """Drop artifacts now rather than when they are next rebuilt"""
+        for name in names:
+            self._entries.pop(name, None)
+
+    def clear(self):
+        self._entries.clear()
+
+derived_artifacts = DerivedArtifacts()
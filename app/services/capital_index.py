@@ -0,0 +1,103 @@
+import hashlib
+import heapq
+import math
+from array import array
+
+EARTH_RADIUS_KM = 6371.0088
+
+def to_unit_vector(lat: float, lon: float):
+    """Project a coordinate onto the unit sphere so chord length orders points like great-circle distance"""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class CapitalIndex:
+    """
+    KD-tree over capital coordinates for k-nearest queries, plus a lazily computed
+    float32 distance matrix. Build one per countries dataset version.
+    """
+
+    def __init__(self, capitals, version=None):
+        self.capitals = capitals
+        self.version = version
+        self.codes = [capital["code"] for capital in capitals]
+        # The distance matrix depends only on the codes and coordinates; unlike `version`,
+        # this is the same in every process and across restarts
+        self.digest = hashlib.sha256(
+            repr([(c["code"], c["lat"], c["lon"]) for c in capitals]).encode("utf-8")
+        ).hexdigest()[:16]
+        self._points = [to_unit_vector(c["lat"], c["lon"]) for c in capitals]
+        self._tree = self._build(list(range(len(capitals))), 0)
+        self._matrix = None
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        mid = len(indices) // 2
+        return (
+            indices[mid],
+            axis,
+            self._build(indices[:mid], depth + 1),
+            self._build(indices[mid + 1:], depth + 1)
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 1):
+        """Return up to k (capital, distance_km) pairs ordered by distance"""
+        target = to_unit_vector(lat, lon)
+        heap = []  # max-heap of (-squared chord, index)
+
+        def search(node):
+            if node is None:
+                return
+            idx, axis, left, right = node
+            point = self._points[idx]
+            dist = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist, idx))
+            elif dist < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist, idx))
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                search(far)
+
+        search(self._tree)
+        return [
+            (self.capitals[idx], chord_to_km(math.sqrt(-neg_dist)))
+            for neg_dist, idx in sorted(heap, reverse=True)
+        ]
+
+    def distance_matrix(self):
+        """Row-major float32 matrix of haversine distances in km, computed once"""
+        if self._matrix is None:
+            n = len(self.capitals)
+            coords = [(c["lat"], c["lon"]) for c in self.capitals]
+            matrix = array("f", bytes(4 * n * n))
+            for i in range(n):
+                lat1, lon1 = coords[i]
+                for j in range(i + 1, n):
+                    distance = haversine_km(lat1, lon1, *coords[j])
+                    matrix[i * n + j] = distance
+                    matrix[j * n + i] = distance
+            self._matrix = matrix
+        return self._matrix
+
+    def distance_rows(self, decimals: int = 1):
+        """Distance matrix as nested lists for JSON responses"""
+        n = len(self.capitals)
+        matrix = self.distance_matrix()
+        return [[round(v, decimals) for v in matrix[i * n:(i + 1) * n]] for i in range(n)]
@@ -1,78 +1,194 @@
 import httpx
 import asyncio
+import orjson
 import time
+from dataclasses import dataclass
+from typing import Optional
 from fastapi import Depends
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.tracing import span
+from app.services.artifacts import derived_artifacts
+from app.services.data_events import data_events
+from app.services.shared_dataset import shared_dataset
+from app.services.capital_index import CapitalIndex
+from app.services.upstream import upstream
+from app.utils.async_utils import LoopLocalLock
+
+@dataclass(frozen=True, slots=True)
+class CountryRecord:
+    """
+    The parts of a REST Countries entry this API uses
+    """
+    code: str
+    code3: Optional[str]
+    name: Optional[str]
+    capitals: tuple
+    subregion: Optional[str]
+    currencies: tuple
+    capital_latlng: Optional[tuple]
+    borders: tuple
+
+    @property
+    def capital(self):
+        return ", ".join(self.capitals) if self.capitals else None
+
+    @property
+    def currency(self):
+        return self.currencies[0] if self.currencies else None
+
+    @classmethod
+    def from_json(cls, data):
+        latlng = (data.get("capitalInfo") or {}).get("latlng")
+        return cls(
+            code=data["cca2"],
+            code3=data.get("cca3"),
+            name=(data.get("name") or {}).get("common"),
+            capitals=tuple(data.get("capital") or ()),
+            subregion=data.get("subregion"),
+            currencies=tuple(data.get("currencies") or ()),
+            capital_latlng=tuple(latlng) if latlng and len(latlng) == 2 else None,
+            borders=tuple(data.get("borders") or ())
+        )
+
+def parse_countries(content: bytes):
+    """Parse a REST Countries response body into CountryRecords, skipping entries without a code"""
+    return [CountryRecord.from_json(c) for c in orjson.loads(content) if c.get("cca2")]
 
 class CountryService:
     """
     Service for fetching and processing country data
     """
-    
+
+    # Parsed countries shared across requests; _countries_digest is the hash of the upstream
+    # body and keys everything derived from it
+    _countries_cache = None
+    _countries_cache_time = 0
+    _countries_digest = None
+    _countries_cache_lock = LoopLocalLock()
+
     def __init__(self):
         self.rest_countries_url = settings.REST_COUNTRIES_URL
         self.region_order = settings.REGION_ORDER
         self.timeout = settings.EXTERNAL_API_TIMEOUT
-        self._countries_cache = None
-        self._countries_cache_time = 0
         self._countries_cache_ttl = settings.CACHE_TTL
-        self._countries_cache_lock = asyncio.Lock()
 
-    async def fetch_countries(self):
+    async def fetch_countries(self, force_refresh=False):
         """Fetch countries from the REST Countries API"""
         now = time.time()
-        async with self._countries_cache_lock:
-            if (
-                settings.CACHE_ENABLED and
-                self._countries_cache and
-                now - self._countries_cache_time < self._countries_cache_ttl
-            ):
-                return self._countries_cache
-            # Fetch from RestCountries API
-            async with httpx.AsyncClient(timeout=settings.EXTERNAL_API_TIMEOUT) as client:
-                response = await client.get(settings.REST_COUNTRIES_URL)
-                response.raise_for_status()
-                countries = response.json()
-                self._countries_cache = countries
-                self._countries_cache_time = now
-                return countries
-    
+        cls = type(self)
+        with span("countries") as timing:
+            async with cls._countries_cache_lock:
+                if (
+                    not force_refresh and
+                    settings.CACHE_ENABLED and
+                    cls._countries_cache and
+                    now - cls._countries_cache_time < self._countries_cache_ttl
+                ):
+                    timing.set(cache="hit")
+                    return cls._countries_cache
+                if not cls._countries_cache:
+                    upstream.forget(self.rest_countries_url)
+                # Conditional fetch from RestCountries API, limited to the fields CountryRecord keeps
+                async with httpx.AsyncClient(timeout=settings.EXTERNAL_API_TIMEOUT) as client:
+                    result = await upstream.fetch(
+                        client,
+                        self.rest_countries_url,
+                        params={"fields": settings.REST_COUNTRIES_FIELDS}
+                    )
+                cls._countries_cache_time = now
+                timing.set(cache="miss" if result.changed else "revalidated")
+                if result.changed:
+                    countries = parse_countries(result.content)
+                    cls._countries_cache = countries
+                    cls._countries_digest = result.digest
+                    data_events.record("countries", {c.code: c for c in countries})
+                upstream.commit(result)
+                return cls._countries_cache
+
+    @property
+    def countries_digest(self):
+        return type(self)._countries_digest
+
     async def get_african_capitals_by_region(self):
         """
         Fetches African countries and returns their capitals grouped by region
         """
         countries = await self.fetch_countries()
-        
+        return derived_artifacts.get(
+            "capitals_by_region",
+            self.countries_digest,
+            lambda: self._group_capitals_by_region(countries)
+        )
+
+    def _group_capitals_by_region(self, countries):
         grouped = {region: [] for region in self.region_order}
         for country in countries:
-            name = country.get("name", {}).get("common")
-            capitals = country.get("capital", [])
-            capital = ", ".join(capitals) if capitals else None
-            subregion = country.get("subregion")
-            if name and capital and subregion in grouped:
-                grouped[subregion].append({"country": name, "capital": capital})
+            capital = country.capital
+            if country.name and capital and country.subregion in grouped:
+                grouped[country.subregion].append({"country": country.name, "capital": capital})
 
         result = []
         for region in self.region_order:
             if grouped[region]:
-                result.append({     
+                result.append({
                     "region": region,
                     "countries": sorted(grouped[region], key=lambda x: x["country"])
                 })
-                
+
         return result
-    
+
     async def get_country_data(self, country_code):
         """
         Fetch a single country's data by ISO 3166-1 alpha-2 or alpha-3 code.
         """
         countries = await self.fetch_countries()
-        country_code = country_code.upper()
-        return next(
-            (
-                c for c in countries
-                if c.get("cca2", "").upper() == country_code or c.get("cca3", "").upper() == country_code
-            ),
-            None
-        )
\ No newline at end of file
+        by_code = derived_artifacts.get(
+            "countries_by_code",
+            self.countries_digest,
+            lambda: {
+                **{c.code3.upper(): c for c in countries if c.code3},
+                **{c.code.upper(): c for c in countries}
+            }
+        )
+        return by_code.get(country_code.upper())
+
+    async def get_capital_index(self):
+        """
+        Returns the capital coordinate index for the current countries dataset
+        """
+        countries = await self.fetch_countries()
+        shared = shared_dataset.current()
+        if shared:
+            # Coordinates published by the refresher process
+            return derived_artifacts.get(
+                "capital_index",
+                f"shared-{shared.version}",
+                lambda: self._build_capital_index(countries, shared.capitals, version=shared.version)
+            )
+        return derived_artifacts.get(
+            "capital_index",
+            self.countries_digest,
+            lambda: self._build_capital_index(countries)
+        )
+
+    def _build_capital_index(self, countries, coordinates=None, version=None):
+        if coordinates is None:
+            coordinates = {c.code: c.capital_latlng for c in countries if c.capital_latlng}
+        capitals = [
+            {
+                "code": country.code,
+                "country": country.name,
+                "capital": country.capital,
+                "lat": coordinates[country.code][0],
+                "lon": coordinates[country.code][1]
+            }
+            for country in countries
+            if country.code in coordinates
+        ]
+        capitals.sort(key=lambda c: c["code"])
+
+        if version is None:
+            version = data_events.dataset_version("countries")
+        logger.info(f"Built capital index for {len(capitals)} capitals (version {version})")
+        return CapitalIndex(capitals, version=version)
@@ -0,0 +1,123 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import time
+from app.core.logging import logger
+
+class DataEventBroker:
+    """
+    Tracks content digests of the upstream datasets and notifies subscribers when they change
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.version = 0
+        self.updated_at = None
+        self.max_queue_size = max_queue_size
+        self._digests = {}
+        self._versions = {}
+        self._subscribers = set()
+        self._followed_version = None
+
+    @staticmethod
+    def _encode_default(value):
+        if dataclasses.is_dataclass(value):
+            return dataclasses.astuple(value)
+        return str(value)
+
+    @classmethod
+    def digest(cls, value) -> str:
+        payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=cls._encode_default)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def snapshot(self):
+        """Current global version and the version each dataset last changed at"""
+        return {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "datasets": dict(self._versions)
+        }
+
+    def follow_version(self, version: int):
+        """
+        Number events with `version` instead of this process's own counter. Workers reading a
+        shared dataset follow its version, so every worker reports the same one and a client
+        reconnecting to another worker does not mistake it for missed updates.
+        """
+        self._followed_version = version
+        self.version = version
+
+    def dataset_version(self, dataset: str):
+        """Global version at which the dataset last changed, None if it was never recorded"""
+        return self._versions.get(dataset)
+
+    def record(self, dataset: str, items: dict, complete: bool = True):
+        """
+        Compare the items of a dataset with the last known digests and publish the keys that changed.
+
+        With complete=True the items are the whole dataset, so known keys missing from it are removed.
+        With complete=False keys are learnt as they are first fetched, which is not a change:
+        their digests are stored, and only later changes to them are published.
+        """
+        known = self._digests.setdefault(dataset, {})
+        changed = []
+        for key, value in items.items():
+            digest = self.digest(value)
+            previous = known.get(key)
+            if previous != digest:
+                known[key] = digest
+                if complete or previous is not None:
+                    changed.append(key)
+
+        removed = []
+        if complete:
+            removed = [key for key in known if key not in items]
+            for key in removed:
+                del known[key]
+
+        if changed or removed:
+            self._publish(dataset, changed, removed)
+        return changed
+
+    def _publish(self, dataset: str, changed: list, removed: list):
+        self.version = self.version + 1 if self._followed_version is None else self._followed_version
+        self.updated_at = time.time()
+        self._versions[dataset] = self.version
+        event = {
+            "type": "update",
+            "version": self.version,
+            "dataset": dataset,
+            "changed": sorted(changed),
+            "removed": sorted(removed)
+        }
+        logger.info(f"Dataset {dataset} changed ({len(changed)} changed, {len(removed)} removed), version {self.version}")
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and ask it to refetch everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "version": self.version})
+
+    async def listen(self, heartbeat: float):
+        """
+        Yield published events, or None every `heartbeat` seconds without one
+        """
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+data_events = DataEventBroker()
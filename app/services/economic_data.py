@@ -1,18 +1,102 @@
+import hashlib
 import httpx
 import asyncio
 import time
 from fastapi import Depends
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.tracing import span
+from app.services.artifacts import derived_artifacts
 from app.services.countries import CountryService
+from app.services.data_events import data_events
+from app.services.economic_index import EconomicIndex
 from app.services.geo_data import GeoDataService
-from app.utils.async_utils import gather_with_concurrency
+from app.services.indicator_table import IndicatorTable, MISSING
+from app.services.shared_dataset import shared_dataset
+from app.utils.async_utils import LoopLocalLock, gather_with_concurrency
+
+# REST Countries has no median age, so profiles report a fixed estimate
+DEFAULT_MEDIAN_AGE = 25
+
+# Upstream data each response field depends on: World Bank indicator names from
+# EconomicDataService.indicators, "sectors" for the sector indicators, or "country"
+# for the REST Countries record
+PROFILE_FIELD_SOURCES = {
+    "country.name": ("country",),
+    "country.code": (),
+    "country.capital": ("country",),
+    "country.region": ("country",),
+    "economy.gdp": ("gdp",),
+    "economy.gdp_growth": ("gdp_growth",),
+    "economy.currency": ("country",),
+    "economy.key_sectors": ("gdp", "sectors"),
+    "demographics.population": ("population",),
+    "demographics.growth_rate": ("population_growth",),
+    "demographics.median_age": (),
+}
+
+SUMMARY_FIELD_SOURCES = {
+    "name": ("country",),
+    "code": (),
+    "capital": ("country",),
+    "region": ("country",),
+    "population": ("population",),
+    "gdp": ("gdp",),
+    "gdp_growth": ("gdp_growth",),
+}
+
+def parse_fields(value, available):
+    """
+    Parses a comma separated sparse fieldset such as "economy.gdp,demographics".
+    A section name selects all of its fields. Returns None when no fields were requested.
+    """
+    if not value:
+        return None
+    fields = []
+    for field in (f.strip() for f in value.split(",")):
+        if not field:
+            continue
+        matches = [name for name in available if name == field or name.startswith(field + ".")]
+        if not matches:
+            raise ValueError(f"Unknown field: {field}")
+        fields.extend(name for name in matches if name not in fields)
+    return fields or None
+
+def plan_sources(fields, available):
+    """Returns the set of upstream sources needed to produce the fields"""
+    return {source for field in fields for source in available[field]}
+
+def project_fields(data, fields):
+    """Keeps only the requested dotted field paths of a nested result"""
+    projected = {}
+    for field in fields:
+        *sections, key = field.split(".")
+        source, target = data, projected
+        for section in sections:
+            source = source[section]
+            target = target.setdefault(section, {})
+        target[key] = source[key]
+    return projected
 
 class EconomicDataService:
     """
     Service for fetching and processing economic data for African countries
     """
 
+    # Per-country indicator values shared across requests, keyed "<code>:<indicator>"
+    _wb_cache = {}
+    _wb_cache_lock = LoopLocalLock()
+
+    # Bulk-fetched indicator table shared across requests
+    _indicator_table = None
+    _indicator_table_expires = 0
+    _indicator_table_lock = LoopLocalLock()
+
+    # Alpha-2 codes the World Bank publishes data for
+    _world_bank_codes = None
+    _world_bank_codes_retry_at = 0
+    _world_bank_codes_lock = LoopLocalLock()
+
     def __init__(
         self, 
         country_service: CountryService = Depends(),
@@ -37,48 +121,156 @@ class EconomicDataService:
             "Services": "NV.SRV.TOTL.ZS"
         }
 
-        self._wb_cache = {}
-        self._wb_cache_lock = asyncio.Lock()
         self._wb_cache_ttl = settings.CACHE_TTL
 
     async def fetch_world_bank_data(self, country_code, indicator):
-        cache_key = f"{country_code}:{indicator}"
-        now = time.time()
-        async with self._wb_cache_lock:
-            cached = self._wb_cache.get(cache_key)
-            if (
-                settings.CACHE_ENABLED and
-                cached and
-                now - cached['timestamp'] < self._wb_cache_ttl
-            ):
-                return cached['value']
+        with span(f"wb.{indicator}", country=country_code) as timing:
+            # Values published to shared memory by the refresher process need no upstream call
+            shared = shared_dataset.current()
+            if shared:
+                value = shared.indicators.lookup(country_code, indicator)
+                if value is not MISSING:
+                    timing.set(cache="shared")
+                    return value
+            # Then the table fetched in bulk for /economic-data
+            table = self._fresh_indicator_table()
+            if table:
+                value = table.lookup(country_code, indicator)
+                if value is not MISSING:
+                    timing.set(cache="table")
+                    return value
 
-        url = self.world_bank_api_url.format(
-            country_code=country_code, 
-            indicator=indicator
+            cache_key = f"{country_code}:{indicator}"
+            now = time.time()
+            async with self._wb_cache_lock:
+                cached = self._wb_cache.get(cache_key)
+                if (
+                    settings.CACHE_ENABLED and
+                    cached and
+                    now - cached['timestamp'] < self._wb_cache_ttl
+                ):
+                    timing.set(cache="hit")
+                    return cached['value']
+
+            timing.set(cache="miss")
+            url = self.world_bank_api_url.format(
+                country_code=country_code, 
+                indicator=indicator
+            )
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    data = response.json()
+                    value = None
+                    if len(data) > 1 and data[1] and len(data[1]) > 0:
+                        value = data[1][0].get("value")
+                    async with self._wb_cache_lock:
+                        self._wb_cache[cache_key] = {'value': value, 'timestamp': now}
+                    data_events.record("indicators", {cache_key: value}, complete=False)
+                    return value
+                except Exception as e:
+                    timing.set(error=type(e).__name__)
+                    logger.error(f"Error fetching World Bank data: {str(e)}")
+                    return None
+
+    def _fresh_indicator_table(self, margin: float = 0):
+        cls = type(self)
+        if cls._indicator_table is not None and time.time() + margin < cls._indicator_table_expires:
+            return cls._indicator_table
+        return None
+
+    def is_cached(self, country_code, indicator, margin: float = 0) -> bool:
+        """Whether the value is available without an upstream request for at least `margin` seconds"""
+        shared = shared_dataset.current()
+        if shared and shared.indicators.lookup(country_code, indicator) is not MISSING:
+            return True
+        table = self._fresh_indicator_table(margin)
+        if table and table.lookup(country_code, indicator) is not MISSING:
+            return True
+        cached = self._wb_cache.get(f"{country_code}:{indicator}")
+        return bool(
+            settings.CACHE_ENABLED and cached and
+            time.time() + margin - cached['timestamp'] < self._wb_cache_ttl
         )
+
+    async def get_world_bank_codes(self):
+        """
+        The alpha-2 codes the World Bank knows, loaded once per process. None when they could
+        not be loaded, in which case they are retried after a minute.
+        """
+        cls = type(self)
+        if cls._world_bank_codes is not None or time.time() < cls._world_bank_codes_retry_at:
+            return cls._world_bank_codes
+        async with cls._world_bank_codes_lock:
+            if cls._world_bank_codes is not None or time.time() < cls._world_bank_codes_retry_at:
+                return cls._world_bank_codes
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(settings.WORLD_BANK_COUNTRIES_URL)
+                    response.raise_for_status()
+                    data = response.json()
+                if not isinstance(data, list) or len(data) < 2 or not data[1]:
+                    raise ValueError(f"World Bank error response: {data}")
+                cls._world_bank_codes = {row.get("iso2Code") for row in data[1]}
+            except Exception as e:
+                logger.error(f"Error fetching World Bank countries: {str(e)}")
+                cls._world_bank_codes_retry_at = time.time() + 60
+            return cls._world_bank_codes
+
+    async def fetch_indicator_table(self, country_codes):
+        """
+        Fetches every indicator for all the given countries, one World Bank request per indicator
+        """
+        indicators = list(self.indicators.values()) + list(self.sector_indicators.values())
+        # A multi-country query naming a code the World Bank does not know, such as the
+        # territories RE, YT, SH, EH or IO, is rejected as a whole; they stay in the table
+        # without values
+        known = await self.get_world_bank_codes()
+        queried = [code for code in country_codes if code in known] if known else list(country_codes)
         async with httpx.AsyncClient(timeout=self.timeout) as client:
+            responses = await asyncio.gather(
+                *[
+                    client.get(settings.WORLD_BANK_BULK_API_URL.format(
+                        country_codes=";".join(queried),
+                        indicator=indicator
+                    ))
+                    for indicator in indicators
+                ],
+                return_exceptions=True
+            )
+
+        columns = {}
+        for indicator, response in zip(indicators, responses):
             try:
-                response = await client.get(url)
+                if isinstance(response, Exception):
+                    raise response
                 response.raise_for_status()
                 data = response.json()
-                value = None
-                if len(data) > 1 and data[1] and len(data[1]) > 0:
-                    value = data[1][0].get("value")
-                async with self._wb_cache_lock:
-                    self._wb_cache[cache_key] = {'value': value, 'timestamp': now}
-                return value
+                # Errors come back as 200 with a single {"message": [...]} entry and no rows
+                if not isinstance(data, list) or len(data) < 2 or "message" in (data[0] or {}):
+                    raise ValueError(f"World Bank error response: {data}")
+                columns[indicator] = data[1] or []
             except Exception as e:
-                logger.error(f"Error fetching World Bank data: {str(e)}")
-                return None
+                logger.error(f"Error fetching World Bank data for {indicator}: {str(e)}")
+
+        # Indicators that failed are left out, so lookups fall back to per-country requests
+        table = IndicatorTable(country_codes, list(columns))
+        for indicator, rows in columns.items():
+            for row in rows:
+                table.set(row.get("country", {}).get("id"), indicator, row.get("value"))
+        return table
 
-    async def fetch_sector_data(self, country_code, gdp):
+    async def fetch_sector_shares(self, country_code):
         # Fetch sector % of GDP from World Bank
-        results = await asyncio.gather(
-            *[self.fetch_world_bank_data(country_code, ind) for ind in self.sector_indicators.values()]
-        )
+        with span("sectors", country=country_code):
+            return await asyncio.gather(
+                *[self.fetch_world_bank_data(country_code, ind) for ind in self.sector_indicators.values()]
+            )
+
+    def sector_data(self, shares, gdp):
         sectors = []
-        for name, percent in zip(self.sector_indicators.keys(), results):
+        for name, percent in zip(self.sector_indicators.keys(), shares):
             if percent is not None:
                 value = round(gdp * percent / 100 / 1e9, 2) if gdp and percent else None  # in billions
                 sectors.append({
@@ -88,104 +280,200 @@ class EconomicDataService:
                 })
         return sectors
 
-    async def get_country_economic_data(self, country_code):
+    async def fetch_indicators(self, country_code, names):
         """
-        Fetches economic data for a specific country
+        Fetches the named World Bank indicators for a country concurrently
         """
-        country_code = country_code.upper()
-        if len(country_code) == 3:
-            code_mapping = {"KEN": "KE", "NGA": "NG", "ZAF": "ZA", "EGY": "EG", "GHA": "GH"}
-            country_code = code_mapping.get(country_code, country_code[:2])
-
-        countries = await self.country_service.fetch_countries()
-        country_data = next((c for c in countries if c.get("cca2") == country_code or c.get("cca3") == country_code), None)
-        if not country_data:
-            return None
-
-        gdp = await self.fetch_world_bank_data(country_code, self.indicators["gdp"])
-        try:
-            gdp_growth = await self.fetch_world_bank_data(country_code, self.indicators["gdp_growth"])
-        except Exception:
-            gdp_growth = None
-        population = await self.fetch_world_bank_data(country_code, self.indicators["population"])
-        try:
-            population_growth = await self.fetch_world_bank_data(country_code, self.indicators["population_growth"])
-        except Exception:
-            population_growth = None
-        sectors = await self.fetch_sector_data(country_code, gdp)
+        names = [name for name in self.indicators if name in names]
+        results = await gather_with_concurrency(
+            3,  # Max 3 concurrent requests
+            5,  # 5 second timeout
+            *[self.fetch_world_bank_data(country_code, self.indicators[name]) for name in names]
+        )
+        return dict(zip(names, results))
 
-        # Return whatever data is available
+    async def _build_profile(self, country_code, country_data, sources, capital):
+        sectors = None
+        if "sectors" in sources:
+            # The shares do not depend on the GDP, only their values do, so they are fetched
+            # alongside the indicators rather than after them
+            values, shares = await asyncio.gather(
+                self.fetch_indicators(country_code, sources), self.fetch_sector_shares(country_code)
+            )
+            sectors = self.sector_data(shares, values.get("gdp"))
+        else:
+            values = await self.fetch_indicators(country_code, sources)
         return {
             "country": {
-                "name": country_data.get("name", {}).get("common"),
+                "name": country_data.name,
                 "code": country_code,
-                "capital": ", ".join(country_data.get("capital", [])) if country_data.get("capital") else None,
-                "region": country_data.get("subregion")
+                "capital": capital(country_data),
+                "region": country_data.subregion
             },
             "economy": {
-                "gdp": gdp,
-                "gdp_growth": gdp_growth,
-                "currency": list(country_data.get("currencies", {}).keys())[0] if country_data.get("currencies") else None,
+                "gdp": values.get("gdp"),
+                "gdp_growth": values.get("gdp_growth"),
+                "currency": country_data.currency,
                 "key_sectors": sectors
             },
             "demographics": {
-                "population": population,
-                "growth_rate": population_growth,
-                "median_age": country_data.get("median_age", 25)
+                "population": values.get("population"),
+                "growth_rate": values.get("population_growth"),
+                "median_age": DEFAULT_MEDIAN_AGE
             }
         }
 
-    async def get_all_economic_data(self):
-        countries = await self.country_service.fetch_countries()
-        result = []
-        for country in countries:
-            country_code = country.get("cca2")
-            if not country_code:
-                continue
-            result.append({
-                "name": country.get("name", {}).get("common"),
-                "code": country_code,
-                "capital": ", ".join(country.get("capital", [])) if country.get("capital") else None,
-                "population": await self.fetch_world_bank_data(country_code, self.indicators["population"]),
-                "gdp": await self.fetch_world_bank_data(country_code, self.indicators["gdp"])
-            })
-        return result
+    async def get_country_economic_data(self, country_code, fields=None):
+        """
+        Fetches economic data for a specific country, limited to `fields` when given
+        """
+        fields = fields or list(PROFILE_FIELD_SOURCES)
+        sources = plan_sources(fields, PROFILE_FIELD_SOURCES)
 
-    async def get_country_profile(self, country_code):
-        try:
-            indicators = [
-                self.fetch_world_bank_data(country_code, ind)
-                for ind in self.indicators.values()
-            ]
-            results = await gather_with_concurrency(
-                3,  # Max 3 concurrent requests
-                5,  # 5 second timeout
-                *indicators
+        # Always resolved, even when no country field is requested: unknown codes are not
+        # answered with an empty profile, and "ke" or "KEN" use the caches keyed on "KE"
+        country_data = await self.country_service.get_country_data(country_code)
+        if not country_data:
+            return None
+
+        # Return whatever data is available
+        result = await self._build_profile(
+            country_data.code, country_data, sources,
+            capital=lambda c: c.capital
+        )
+        return project_fields(result, fields)
+
+    async def get_indicator_table(self, country_codes, force_refresh=False, use_shared=True):
+        """
+        All indicators for the given countries: the table published to shared memory, else
+        one fetched in bulk and kept for CACHE_TTL. A table missing indicators is retried
+        after a minute.
+        """
+        shared = shared_dataset.current() if use_shared and not force_refresh else None
+        if shared:
+            return shared.indicators
+        cls = type(self)
+        async with cls._indicator_table_lock:
+            now = time.time()
+            if (
+                force_refresh or
+                cls._indicator_table is None or
+                cls._indicator_table.codes != list(country_codes) or
+                now >= cls._indicator_table_expires
+            ):
+                table = await self.fetch_indicator_table(country_codes)
+                complete = len(table.indicators) == len(self.indicators) + len(self.sector_indicators)
+                cls._indicator_table = table
+                cls._indicator_table_expires = now + (self._wb_cache_ttl if complete else 60)
+                # Profiles are answered from this table, so its changes are what /events
+                # subscribers need to hear about; the broker diffs it against the last digests
+                data_events.record(
+                    "indicators",
+                    {
+                        f"{code}:{indicator}": table.lookup(code, indicator)
+                        for code in table.codes for indicator in table.indicators
+                    },
+                    complete=False
+                )
+            return cls._indicator_table
+
+    async def get_economic_index(self, force_refresh=False):
+        """
+        The /economic-data rows with their sort orders and region partitions, rebuilt only
+        when the countries or indicator values change
+        """
+        # The World Bank's country list is loaded alongside the countries, not before the table
+        countries, _ = await asyncio.gather(
+            self.country_service.fetch_countries(), self.get_world_bank_codes()
+        )
+        table = await self.get_indicator_table([c.code for c in countries], force_refresh=force_refresh)
+        key = f"{self.country_service.countries_digest}:{table.digest()}"
+        index = derived_artifacts.lookup("economic_index", key)
+        if index is not None:
+            return index
+
+        names = ("gdp", "gdp_growth", "population")
+        columns = {
+            name: table.column(self.indicators[name])
+            for name in names if self.indicators[name] in table.indicators
+        }
+        # Indicators the bulk request failed for are fetched per country
+        missing = [name for name in names if name not in columns]
+        if missing:
+            values = await gather_with_concurrency(
+                10,
+                self.timeout,
+                *[
+                    self.fetch_world_bank_data(country.code, self.indicators[name])
+                    for name in missing for country in countries
+                ]
             )
-            gdp, gdp_growth, population, population_growth = results
+            for i, name in enumerate(missing):
+                column = values[i * len(countries):(i + 1) * len(countries)]
+                columns[name] = dict(zip([c.code for c in countries], column))
+        positions = {code: i for i, code in enumerate(table.codes)}
+
+        def value(name, code):
+            column = columns[name]
+            if isinstance(column, dict):
+                return column.get(code)
+            row = positions.get(code)
+            return column[row] if row is not None else None
+
+        rows = [
+            {
+                "name": country.name,
+                "code": country.code,
+                "capital": country.capital,
+                "region": country.subregion,
+                "population": value("population", country.code),
+                "gdp": value("gdp", country.code),
+                "gdp_growth": value("gdp_growth", country.code)
+            }
+            for country in countries
+        ]
+
+        def build():
+            index = EconomicIndex(rows, version=hashlib.sha1(key.encode("utf-8")).hexdigest()[:12])
+            logger.info(f"Built economic data index for {len(rows)} countries")
+            return index
+
+        return derived_artifacts.get("economic_index", key, build)
+
+    async def get_all_economic_data(self, fields=None, region=None, sort=None, order="desc", limit=None, cursor=None):
+        """
+        A page of the economic data summary, optionally limited to a region and sorted.
+        With the default fields the response body is returned pre-serialized as bytes.
+        """
+        index = await self.get_economic_index()
+        if region is not None:
+            matched = index.find_region(region)
+            if matched is None:
+                raise ValueError(f"Unknown region: {region}. Available: {', '.join(index.regions)}")
+            region = matched
+        positions, total, next_cursor = index.page(region, sort, order, limit, cursor)
+        if fields is None:
+            return index.render(positions, total, next_cursor)
+        return {
+            "economic_data": [project_fields(index.rows[i], fields) for i in positions],
+            "total": total,
+            "next_cursor": next_cursor
+        }
+
+    async def get_country_profile(self, country_code, fields=None):
+        try:
+            fields = fields or list(PROFILE_FIELD_SOURCES)
+            sources = plan_sources(fields, PROFILE_FIELD_SOURCES)
+            # Unknown codes are rejected whichever fields are requested, and known ones are
+            # fetched under the alpha-2 code the caches use
             country_data = await self.country_service.get_country_data(country_code)
             if not country_data:
                 return None
-            sectors = await self.fetch_sector_data(country_code, gdp)
-            return {
-                "country": {
-                    "name": country_data.get("name", {}).get("common"),
-                    "code": country_code,
-                    "capital": country_data.get("capital", [""])[0],
-                    "region": country_data.get("subregion")
-                },
-                "economy": {
-                    "gdp": gdp,
-                    "gdp_growth": gdp_growth,
-                    "currency": next(iter(country_data.get("currencies", {}).keys()), None),
-                    "key_sectors": sectors
-                },
-                "demographics": {
-                    "population": population,
-                    "growth_rate": population_growth,
-                    "median_age": country_data.get("median_age", 25)
-                }
-            }
+            result = await self._build_profile(
+                country_data.code, country_data, sources,
+                capital=lambda c: c.capitals[0] if c.capitals else None
+            )
+            return project_fields(result, fields)
         except Exception as e:
             logger.error(f"Error getting country profile: {str(e)}")
-            return None
\ No newline at end of file
+            return None
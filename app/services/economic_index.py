@@ -0,0 +1,92 @@
+import base64
+import hashlib
+from array import array
+import orjson
+
+# Sortable /economic-data columns
+SORT_KEYS = ("gdp", "population", "gdp_growth")
+
+class InvalidCursor(ValueError):
+    pass
+
+class EconomicIndex:
+    """
+    The /economic-data rows with every query answer precomputed: for each region (None for
+    all) and ordering, the row positions in order. A query is a slice of one of these
+    arrays; with the default fields the rows are also pre-serialized.
+
+    Orderings are "upstream" (REST Countries order) and (key, "asc" | "desc") for each
+    SORT_KEYS column. Rows without a value sort last in both directions.
+    """
+
+    def __init__(self, rows, version: str):
+        self.rows = rows
+        self.version = version
+        self.encoded_rows = [orjson.dumps(row) for row in rows]
+        self.regions = sorted({row["region"] for row in rows if row.get("region")})
+
+        orderings = {"upstream": list(range(len(rows)))}
+        for key in SORT_KEYS:
+            present = [i for i, row in enumerate(rows) if row.get(key) is not None]
+            missing = [i for i, row in enumerate(rows) if row.get(key) is None]
+            ascending = sorted(present, key=lambda i: rows[i][key])
+            orderings[(key, "asc")] = ascending + missing
+            orderings[(key, "desc")] = ascending[::-1] + missing
+
+        # "H" keeps each partition at two bytes per row
+        self._partitions = {}
+        for ordering, positions in orderings.items():
+            self._partitions[(None, ordering)] = array("H", positions)
+            for region in self.regions:
+                self._partitions[(region, ordering)] = array(
+                    "H", [i for i in positions if rows[i].get("region") == region]
+                )
+
+    def find_region(self, name: str):
+        """The region matching `name` case-insensitively, or None"""
+        for region in self.regions:
+            if region.lower() == name.lower():
+                return region
+        return None
+
+    @staticmethod
+    def query_key(region, ordering) -> str:
+        """Short hash of the partition a cursor pages through"""
+        return hashlib.sha256(repr((region, ordering)).encode("utf-8")).hexdigest()[:12]
+
+    def encode_cursor(self, offset: int, query: str) -> str:
+        return base64.urlsafe_b64encode(f"{self.version}:{query}:{offset}".encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str, query: str) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            version, cursor_query, offset = base64.urlsafe_b64decode(padded).decode("utf-8").rsplit(":", 2)
+            offset = int(offset)
+        except ValueError:
+            raise InvalidCursor("Invalid cursor")
+        if version != self.version:
+            raise InvalidCursor("Cursor expired: the data changed since it was issued, start again without a cursor")
+        # An offset is only meaningful in the partition it was issued for
+        if cursor_query != query or offset < 0:
+            raise InvalidCursor("Invalid cursor: it was issued for a different region, sort or order")
+        return offset
+
+    def page(self, region=None, sort=None, order="desc", limit=None, cursor=None):
+        """Returns (row positions, total rows in the partition, next cursor or None)"""
+        ordering = (sort, order) if sort else "upstream"
+        positions = self._partitions[(region, ordering)]
+        query = self.query_key(region, ordering)
+        start = self.decode_cursor(cursor, query) if cursor else 0
+        end = len(positions) if limit is None else min(start + limit, len(positions))
+        next_cursor = self.encode_cursor(end, query) if end < len(positions) else None
+        return positions[start:end], len(positions), next_cursor
+
+    def render(self, positions, total: int, next_cursor) -> bytes:
+        """The response body for a page with the default fields, joined from encoded rows"""
+        return b"".join([
+            b'{"economic_data":[',
+            b",".join([self.encoded_rows[i] for i in positions]),
+            b'],"total":', str(total).encode("ascii"),
+            b',"next_cursor":', orjson.dumps(next_cursor),
+            b"}"
+        ])
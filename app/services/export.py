@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timezone
+from fastapi import Depends
+from app.core.logging import logger
+from app.services.countries import CountryService
+from app.services.data_events import data_events
+from app.services.economic_data import EconomicDataService
+
+# Media type and file extension of each export format
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+class ExportUnavailable(RuntimeError):
+    """Raised when pyarrow, an optional dependency, is not installed"""
+
+def _pyarrow():
+    # pyarrow is large and only needed for exports, so it is imported on first use
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ExportUnavailable("pyarrow is required for exports: pip install pyarrow") from e
+    return pyarrow
+
+class ExportService:
+    """
+    Builds the joined country and indicator dataset column by column and serializes it as
+    Arrow IPC or Parquet
+    """
+
+    def __init__(
+        self,
+        country_service: CountryService = Depends(),
+        economic_service: EconomicDataService = Depends()
+    ):
+        self.country_service = country_service
+        self.economic_service = economic_service
+
+    def indicator_columns(self):
+        """(column name, World Bank indicator) for every indicator in the export"""
+        columns = list(self.economic_service.indicators.items())
+        columns += [
+            (f"{name.lower()}_pct_gdp", indicator)
+            for name, indicator in self.economic_service.sector_indicators.items()
+        ]
+        return columns
+
+    async def build_columns(self):
+        """The dataset as a dict of equal-length column lists, one entry per country"""
+        countries = await self.country_service.fetch_countries()
+        codes = [c.code for c in countries]
+        table = await self.economic_service.get_indicator_table(codes)
+
+        columns = {
+            "code": codes,
+            "code3": [c.code3 for c in countries],
+            "name": [c.name for c in countries],
+            "capital": [c.capital for c in countries],
+            "region": [c.subregion for c in countries],
+            "capital_lat": [c.capital_latlng[0] if c.capital_latlng else None for c in countries],
+            "capital_lon": [c.capital_latlng[1] if c.capital_latlng else None for c in countries],
+            "currency": [c.currency for c in countries],
+        }
+        # Indicator columns are read straight out of the table, reordered to the countries
+        positions = {code: i for i, code in enumerate(table.codes)}
+        rows = [positions.get(code) for code in codes]
+        for name, indicator in self.indicator_columns():
+            if indicator in table.indicators:
+                values = table.column(indicator)
+                columns[name] = [values[row] if row is not None else None for row in rows]
+            else:
+                columns[name] = [None] * len(codes)
+        return columns
+
+    def to_arrow(self, columns):
+        pa = _pyarrow()
+        indicator_fields = [
+            pa.field(name, pa.float64(), metadata={"world_bank_indicator": indicator})
+            for name, indicator in self.indicator_columns()
+        ]
+        schema = pa.schema(
+            [pa.field(name, pa.string()) for name in ("code", "code3", "name", "capital", "region")] +
+            [pa.field("capital_lat", pa.float64()), pa.field("capital_lon", pa.float64())] +
+            [pa.field("currency", pa.string())] +
+            indicator_fields,
+            metadata={
+                "data_version": str(data_events.version),
+                "generated_at": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    @staticmethod
+    def serialize(table, fmt: str) -> bytes:
+        pa = _pyarrow()
+        sink = pa.BufferOutputStream()
+        if fmt == "parquet":
+            pa.parquet.write_table(table, sink, compression="zstd")
+        else:
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    async def export(self, fmt: str) -> bytes:
+        """The dataset in `fmt` ("arrow" or "parquet")"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        _pyarrow()
+        columns = await self.build_columns()
+        # Encoding runs in a thread so it does not stall the event loop
+        data = await asyncio.to_thread(lambda: self.serialize(self.to_arrow(columns), fmt))
+        logger.info(f"Exported {len(columns['code'])} countries as {fmt} ({len(data)} bytes)")
+        return data
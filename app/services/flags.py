@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import hashlib
+import httpx
+import os
+import time
+from dataclasses import dataclass, field
+from fastapi import Depends
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.countries import CountryService
+from app.utils.async_utils import LoopLocalLock, gather_with_concurrency
+
+FLAG_WIDTH = 64
+FLAG_HEIGHT = 48
+SPRITE_COLUMNS = 10
+
+@dataclass
+class FlagSprite:
+    """One SVG holding every flag, and each flag's offset in it"""
+    svg: bytes
+    version: str
+    offsets: dict
+    missing: list = field(default_factory=list)
+
+    @property
+    def manifest(self) -> dict:
+        rows = -(-max(len(self.offsets), 1) // SPRITE_COLUMNS)
+        return {
+            "version": self.version,
+            "width": SPRITE_COLUMNS * FLAG_WIDTH,
+            "height": rows * FLAG_HEIGHT,
+            "flag_width": FLAG_WIDTH,
+            "flag_height": FLAG_HEIGHT,
+            "flags": self.offsets
+        }
+
+def build_sprite(flags: dict) -> FlagSprite:
+    """
+    Lays the PNG flags (alpha-2 code -> bytes, None when unavailable) out on a grid in one
+    SVG. Each is embedded as a data URI, which browsers load even when the SVG is used as a
+    CSS background image, so the sheet is a single request.
+    """
+    present = sorted(code for code, png in flags.items() if png)
+    rows = -(-max(len(present), 1) // SPRITE_COLUMNS)
+    width, height = SPRITE_COLUMNS * FLAG_WIDTH, rows * FLAG_HEIGHT
+    offsets = {}
+    images = []
+    for i, code in enumerate(present):
+        x, y = (i % SPRITE_COLUMNS) * FLAG_WIDTH, (i // SPRITE_COLUMNS) * FLAG_HEIGHT
+        offsets[code] = [x, y]
+        data = base64.b64encode(flags[code]).decode("ascii")
+        images.append(
+            f'<image x="{x}" y="{y}" width="{FLAG_WIDTH}" height="{FLAG_HEIGHT}" '
+            f'xlink:href="data:image/png;base64,{data}"/>'
+        )
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        + "".join(images) + "</svg>"
+    ).encode("utf-8")
+    return FlagSprite(
+        svg=svg,
+        version=hashlib.sha256(svg).hexdigest()[:16],
+        offsets=offsets,
+        missing=sorted(code for code, png in flags.items() if not png)
+    )
+
+class FlagSpriteService:
+    """
+    Builds the flag sprite for the current countries. Flags are downloaded once into the
+    cache directory and reused across refreshes and restarts; the sprite is rebuilt when
+    the countries change. A sprite with missing flags is retried after a minute.
+    """
+
+    _sprite = None
+    _sprite_key = None
+    _sprite_retry_at = 0
+    _sprite_lock = LoopLocalLock()
+
+    def __init__(self, country_service: CountryService = Depends()):
+        self.country_service = country_service
+        self.timeout = settings.EXTERNAL_API_TIMEOUT
+        self.cache_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "flags"
+        )
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _is_current(self, key) -> bool:
+        cls = type(self)
+        return (
+            cls._sprite is not None and
+            cls._sprite_key == key and
+            (not cls._sprite.missing or time.time() < cls._sprite_retry_at)
+        )
+
+    async def get_sprite(self) -> FlagSprite:
+        countries = await self.country_service.fetch_countries()
+        key = self.country_service.countries_digest
+        cls = type(self)
+        if self._is_current(key):
+            return cls._sprite
+        async with cls._sprite_lock:
+            if self._is_current(key):
+                return cls._sprite
+            codes = [c.code for c in countries if c.code]
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                flags = await gather_with_concurrency(
+                    8, self.timeout, *[self._load_flag(client, code) for code in codes]
+                )
+            sprite = await asyncio.to_thread(build_sprite, dict(zip(codes, flags)))
+            if sprite.missing:
+                logger.warning(f"Flag sprite is missing {', '.join(sprite.missing)}")
+            else:
+                logger.info(f"Built flag sprite with {len(sprite.offsets)} flags ({len(sprite.svg)} bytes)")
+            cls._sprite = sprite
+            cls._sprite_key = key
+            cls._sprite_retry_at = time.time() + 60
+            return sprite
+
+    async def _load_flag(self, client, code: str):
+        """A flag's PNG from the cache directory, downloading it the first time"""
+        path = os.path.join(self.cache_dir, f"{code.lower()}.png")
+        if os.path.exists(path):
+            return await asyncio.to_thread(self._read_file, path)
+        try:
+            response = await client.get(settings.FLAG_URL.format(code=code.lower()))
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error fetching flag for {code}: {str(e)}")
+            return None
+        await asyncio.to_thread(self._write_file, path, response.content)
+        return response.content
+
+    @staticmethod
+    def _read_file(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write_file(path, content):
+        # Written under a temporary name so other processes never read a partial flag
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "wb") as f:
+            f.write(content)
+        os.replace(partial, path)
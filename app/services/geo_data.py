@@ -1,103 +1,237 @@
+import asyncio
+import hashlib
 import httpx
 import json
+import orjson
 import os
 from fastapi import Depends
 from app.core.config import settings
 from app.core.logging import logger
+from app.services.artifacts import derived_artifacts
+from app.services.data_events import data_events
+from app.services.label_points import label_point
+from app.services.shared_dataset import shared_dataset
+from app.services.spatial_index import SpatialIndex
+from app.services.upstream import upstream
+from app.utils.async_utils import LoopLocalLock
 
 class GeoDataService:
     """
     Service for fetching and processing geographic data for African countries
     """
+
+    # GeoJSON shared across requests; _geojson_digest is the hash of the cached file
+    # and keys everything derived from it
+    _geojson = None
+    _geojson_digest = None
+    _geojson_shared_version = None
+    _geojson_lock = LoopLocalLock()
     
     def __init__(self):
         self.timeout = settings.EXTERNAL_API_TIMEOUT
         self.natural_earth_url = "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/geojson/ne_110m_admin_0_countries.geojson"
         self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+        self.cache_file = os.path.join(self.cache_dir, "countries.geojson")
+        self.cache_meta_file = self.cache_file + ".meta.json"
         
         # Create cache directory if it doesn't exist
         os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def geojson_digest(self):
+        return type(self)._geojson_digest
+
+    def _load_cache_file(self):
+        """Load the cached GeoJSON and restore the upstream validators it was downloaded with"""
+        with open(self.cache_file, 'rb') as f:
+            content = f.read()
+        cls = type(self)
+        cls._geojson = orjson.loads(content)
+        cls._geojson_digest = hashlib.sha256(content).hexdigest()
+        try:
+            with open(self.cache_meta_file, 'r') as f:
+                meta = json.load(f)
+            if meta.get("digest") == cls._geojson_digest:
+                upstream.seed(self.natural_earth_url, meta["digest"], meta.get("etag"), meta.get("last_modified"))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _read_json(path):
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+
+    def _write_cache_file(self, result):
+        with open(self.cache_file, 'wb') as f:
+            f.write(result.content)
+        self._write_cache_meta(result)
+
+    def _write_cache_meta(self, result):
+        with open(self.cache_meta_file, 'w') as f:
+            json.dump({"digest": result.digest, "etag": result.etag, "last_modified": result.last_modified}, f)
     
-    async def fetch_geojson(self):
+    async def fetch_geojson(self, force_refresh=False):
         """Fetch GeoJSON data from Natural Earth"""
-        cache_file = os.path.join(self.cache_dir, "countries.geojson")
-        
-        # Check if we have cached data
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error reading cached GeoJSON: {str(e)}")
-                # If there's an error reading the cache, fetch from source
-        
-        # Fetch from source
-        logger.debug(f"Fetching GeoJSON from {self.natural_earth_url}")
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(self.natural_earth_url, timeout=self.timeout)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Cache the data
+        cls = type(self)
+        async with cls._geojson_lock:
+            shared = shared_dataset.current()
+            # Workers follow the geometry the refresher process publishes; only the refresher
+            # forces a refresh, and it already holds what it published
+            if shared and shared.version != cls._geojson_shared_version:
+                cls._geojson_shared_version = shared.version
+                if shared.geojson_digest != cls._geojson_digest:
+                    self._load_shared_geometry(shared)
+            if not force_refresh and cls._geojson is not None:
+                return cls._geojson
+
+            # Check if we have cached data
+            if cls._geojson is None and os.path.exists(self.cache_file):
                 try:
-                    with open(cache_file, 'w') as f:
-                        json.dump(data, f)
+                    await asyncio.to_thread(self._load_cache_file)
+                    if not force_refresh:
+                        return cls._geojson
                 except Exception as e:
-                    logger.error(f"Error caching GeoJSON: {str(e)}")
-                
-                return data
-            except Exception as e:
-                logger.error(f"Error fetching GeoJSON: {str(e)}")
-                
-                # If we have a fallback file, use it
-                fallback_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "countries.geojson")
-                if os.path.exists(fallback_file):
+                    logger.error(f"Error reading cached GeoJSON: {str(e)}")
+                    # If there's an error reading the cache, fetch from source
+            if cls._geojson is None:
+                upstream.forget(self.natural_earth_url)
+
+            # Conditional fetch from source; unchanged data keeps everything derived from it
+            logger.debug(f"Fetching GeoJSON from {self.natural_earth_url}")
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                try:
+                    result = await upstream.fetch(client, self.natural_earth_url)
+                    if result.content is None or result.digest == cls._geojson_digest:
+                        logger.debug("GeoJSON unchanged upstream")
+                        if result.content is not None:
+                            # Same data, but keep the new validators for the next refresh
+                            upstream.commit(result)
+                            await asyncio.to_thread(self._write_cache_meta, result)
+                        return cls._geojson
+
+                    # Parsing and writing several megabytes would block the event loop
+                    data = await asyncio.to_thread(orjson.loads, result.content)
+                    self._record_geometry(data)
+                    cls._geojson = data
+                    cls._geojson_digest = result.digest
+                    upstream.commit(result)
+                    
+                    # Cache the data
                     try:
-                        with open(fallback_file, 'r') as f:
-                            return json.load(f)
-                    except Exception as fallback_error:
-                        logger.error(f"Error reading fallback GeoJSON: {str(fallback_error)}")
-                
-                # If all else fails, return a minimal valid GeoJSON
-                return {
-                    "type": "FeatureCollection",
-                    "features": []
-                }
+                        await asyncio.to_thread(self._write_cache_file, result)
+                    except Exception as e:
+                        logger.error(f"Error caching GeoJSON: {str(e)}")
+                    
+                    return data
+                except Exception as e:
+                    logger.error(f"Error fetching GeoJSON: {str(e)}")
+                    if cls._geojson is not None:
+                        return cls._geojson
+                    
+                    # If we have a fallback file, use it
+                    fallback_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "countries.geojson")
+                    if os.path.exists(fallback_file):
+                        try:
+                            return await asyncio.to_thread(self._read_json, fallback_file)
+                        except Exception as fallback_error:
+                            logger.error(f"Error reading fallback GeoJSON: {str(fallback_error)}")
+                    
+                    # If all else fails, return a minimal valid GeoJSON
+                    return {
+                        "type": "FeatureCollection",
+                        "features": []
+                    }
     
+    def _load_shared_geometry(self, shared):
+        """
+        Replace this worker's geometry with the African features published to shared memory.
+        Everything derived from the previous version is dropped at once, so a worker holds
+        one parsed copy of the geometry however many versions are published.
+        """
+        cls = type(self)
+        cls._geojson = None
+        derived_artifacts.discard("african_geojson", "geojson_by_code", "spatial_index", "map_data_snapshot")
+        cls._geojson = orjson.loads(shared.map_data)
+        cls._geojson_digest = shared.geojson_digest
+        self._record_geometry(cls._geojson)
+
+    def _record_geometry(self, geojson):
+        """Publish which African country geometries changed since the last download"""
+        features = {}
+        for feature in geojson.get("features", []):
+            properties = feature.get("properties", {})
+            if properties.get("CONTINENT") != "Africa":
+                continue
+            code = properties.get("ISO_A2")
+            if not code or code == "-99":
+                code = properties.get("ADM0_A3")
+            features[code] = feature
+        data_events.record("geometry", features)
+
     async def get_all_countries_geojson(self):
         """
         Fetches GeoJSON data for all African countries
         """
         all_geojson = await self.fetch_geojson()
-        
-        # Filter for African countries
-        african_features = [
-            feature for feature in all_geojson.get("features", [])
-            if feature.get("properties", {}).get("CONTINENT") == "Africa"
-        ]
-        
-        return {
-            "type": "FeatureCollection",
-            "features": african_features
-        }
+        digest = self.geojson_digest
+        african_geojson = derived_artifacts.lookup("african_geojson", digest)
+        if african_geojson is not None:
+            return african_geojson
+        # Label points take a few hundred milliseconds, so they are computed off the loop
+        built = await asyncio.to_thread(self._african_geojson, all_geojson)
+        return derived_artifacts.get("african_geojson", digest, lambda: built)
+
+    @staticmethod
+    def _african_geojson(all_geojson):
+        """
+        The African features, each with a LABEL_POINT property: the [lon, lat] of its pole
+        of inaccessibility, where the map places the country's name and flag
+        """
+        features = []
+        for feature in all_geojson.get("features", []):
+            properties = feature.get("properties", {})
+            if properties.get("CONTINENT") != "Africa":
+                continue
+            # Geometry read from shared memory was labelled by the process that published it
+            label = properties.get("LABEL_POINT") or label_point(feature.get("geometry"))
+            features.append({**feature, "properties": {**properties, "LABEL_POINT": label}})
+        return {"type": "FeatureCollection", "features": features}
+
+    async def get_map_data_snapshot(self):
+        """
+        Returns the serialized African FeatureCollection and the digest it was built from,
+        read from shared memory when a refresher process publishes it
+        """
+        shared = shared_dataset.current()
+        if shared:
+            return shared.geojson_digest, shared.map_data_bytes
+        return await self.build_map_data_snapshot()
+
+    async def build_map_data_snapshot(self):
+        """
+        Serializes the African FeatureCollection once per GeoJSON version
+        """
+        african_geojson = await self.get_all_countries_geojson()
+        snapshot = derived_artifacts.get(
+            "map_data_snapshot",
+            self.geojson_digest,
+            lambda: orjson.dumps(african_geojson)
+        )
+        return self.geojson_digest, snapshot
     
     async def get_country_geojson(self, country_code):
         """
         Fetches GeoJSON data for a specific country
         """
         all_geojson = await self.fetch_geojson()
-        
-        # Normalize country code
-        country_code = country_code.upper()
+        features_by_code = derived_artifacts.get(
+            "geojson_by_code",
+            self.geojson_digest,
+            lambda: self._index_features(all_geojson)
+        )
         
         # Find the country feature
-        country_feature = next(
-            (feature for feature in all_geojson.get("features", [])
-             if feature.get("properties", {}).get("ISO_A2") == country_code or
-                feature.get("properties", {}).get("ISO_A3") == country_code),
-            None
-        )
+        country_feature = features_by_code.get(country_code.upper())
         
         if not country_feature:
             return None
@@ -105,4 +239,49 @@ class GeoDataService:
         return {
             "type": "FeatureCollection",
             "features": [country_feature]
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def _index_features(geojson):
+        features_by_code = {}
+        for feature in reversed(geojson.get("features", [])):
+            properties = feature.get("properties", {})
+            # Walk backwards so the first matching feature wins, as with a linear scan
+            for key in ("ISO_A3", "ISO_A2"):
+                if properties.get(key):
+                    features_by_code[properties[key]] = feature
+        return features_by_code
+
+    async def get_spatial_index(self):
+        """
+        Returns the spatial index of African countries, rebuilt only when the GeoJSON changes
+        """
+        african_geojson = await self.get_all_countries_geojson()
+
+        def build():
+            index = SpatialIndex(african_geojson["features"])
+            logger.info(f"Built spatial index for {len(index.countries)} countries")
+            return index
+
+        return derived_artifacts.get("spatial_index", self.geojson_digest, build)
+
+    async def locate(self, lat, lon):
+        """
+        Returns the African country containing the given point, or None
+        """
+        index = await self.get_spatial_index()
+        return index.locate(lat, lon)
+
+    async def locate_many(self, points):
+        """
+        Returns the country code for each (lat, lon) point and a lookup of the matched countries
+        """
+        index = await self.get_spatial_index()
+        codes = index.locate_many(points)
+        matched = set(codes)
+        countries = {
+            country["code"]: country["name"]
+            for country in index.countries
+            if country["code"] in matched
+        }
+        return codes, countries
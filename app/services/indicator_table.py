@@ -0,0 +1,60 @@
+import hashlib
+import math
+from array import array
+
+# Returned by IndicatorTable.lookup for country/indicator pairs the table does not cover
+MISSING = object()
+
+class IndicatorTable:
+    """
+    Dense country x indicator matrix of World Bank values in row-major float64, NaN where
+    the upstream has no value. `values` may be any sequence of doubles, including a
+    memoryview over shared memory.
+    """
+
+    def __init__(self, codes, indicators, values=None):
+        self.codes = list(codes)
+        self.indicators = list(indicators)
+        self._rows = {code: i for i, code in enumerate(self.codes)}
+        self._columns = {indicator: j for j, indicator in enumerate(self.indicators)}
+        if values is None:
+            values = array("d", [math.nan]) * (len(self.codes) * len(self.indicators))
+        self.values = values
+
+    def _offset(self, code, indicator):
+        row = self._rows.get(code)
+        column = self._columns.get(indicator)
+        if row is None or column is None:
+            return None
+        return row * len(self.indicators) + column
+
+    def set(self, code, indicator, value):
+        offset = self._offset(code, indicator)
+        if offset is not None:
+            self.values[offset] = math.nan if value is None else float(value)
+
+    def lookup(self, code, indicator):
+        """The value, None when the upstream has no value, or MISSING when not covered"""
+        offset = self._offset(code, indicator)
+        if offset is None:
+            return MISSING
+        value = self.values[offset]
+        return None if math.isnan(value) else value
+
+    def digest(self) -> str:
+        """Hash of the codes, indicators and values, for keying what is derived from the table"""
+        h = hashlib.sha256()
+        h.update(",".join(self.codes).encode("utf-8"))
+        h.update(b"|")
+        h.update(",".join(self.indicators).encode("utf-8"))
+        h.update(self.values.tobytes())
+        return h.hexdigest()
+
+    def column(self, indicator):
+        """All values of one indicator in `codes` order, None where missing"""
+        column = self._columns[indicator]
+        width = len(self.indicators)
+        return [
+            None if math.isnan(value) else value
+            for value in self.values[column::width]
+        ]
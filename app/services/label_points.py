@@ -0,0 +1,135 @@
+import heapq
+import math
+
+SQRT2 = math.sqrt(2)
+
+def _mercator_y(lat: float) -> float:
+    lat = max(-85.0, min(85.0, lat))
+    return math.degrees(math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)))
+
+def _mercator_lat(y: float) -> float:
+    return math.degrees(2 * math.atan(math.exp(math.radians(y))) - math.pi / 2)
+
+def _edges(polygon):
+    """Each edge of each ring as (ax, ay, dx, dy, squared length), computed once per polygon"""
+    edges = []
+    for ring in polygon:
+        for i in range(len(ring)):
+            ax, ay = ring[i]
+            bx, by = ring[i - 1]
+            dx, dy = bx - ax, by - ay
+            edges.append((ax, ay, dx, dy, dx * dx + dy * dy))
+    return edges
+
+def _signed_distance(x, y, edges):
+    """Distance from (x, y) to the polygon's outline; negative outside it or inside a hole"""
+    inside = False
+    min_sq = math.inf
+    # Inlined: this runs for every edge of every cell the search visits
+    for ax, ay, dx, dy, length_sq in edges:
+        px, py = x - ax, y - ay
+        if (ay > y) != (ay + dy > y) and px < dx * py / dy:
+            inside = not inside
+        if length_sq:
+            t = (px * dx + py * dy) / length_sq
+            if t > 1:
+                px, py = px - dx, py - dy
+            elif t > 0:
+                px, py = px - dx * t, py - dy * t
+        distance_sq = px * px + py * py
+        if distance_sq < min_sq:
+            min_sq = distance_sq
+    return math.sqrt(min_sq) if inside else -math.sqrt(min_sq)
+
+def _ring_area(ring) -> float:
+    return abs(sum(
+        ring[i - 1][0] * ring[i][1] - ring[i][0] * ring[i - 1][1] for i in range(len(ring))
+    )) / 2
+
+def _centroid(ring):
+    area = cx = cy = 0.0
+    for i in range(len(ring)):
+        ax, ay = ring[i - 1]
+        bx, by = ring[i]
+        cross = ax * by - bx * ay
+        area += cross
+        cx += (ax + bx) * cross
+        cy += (ay + by) * cross
+    if not area:
+        return ring[0]
+    return cx / (3 * area), cy / (3 * area)
+
+def pole_of_inaccessibility(polygon, precision: float):
+    """
+    The point inside `polygon` (outer ring, then holes, as (x, y) lists) farthest from its
+    outline, to within `precision`. Grid cells are refined best-first and skipped once
+    they cannot contain a point better than the best found by more than `precision`.
+    """
+    xs = [x for x, _ in polygon[0]]
+    ys = [y for _, y in polygon[0]]
+    min_x, min_y, max_x, max_y = min(xs), min(ys), max(xs), max(ys)
+    cell_size = min(max_x - min_x, max_y - min_y)
+    if cell_size == 0:
+        return min_x, min_y
+
+    edges = _edges(polygon)
+    queue = []
+
+    def push(x, y, half):
+        distance = _signed_distance(x, y, edges)
+        # Max-heap on the best distance any point in the cell could have
+        heapq.heappush(queue, (-(distance + half * SQRT2), distance, x, y, half))
+
+    half = cell_size / 2
+    x = min_x
+    while x < max_x:
+        y = min_y
+        while y < max_y:
+            push(x + half, y + half, half)
+            y += cell_size
+        x += cell_size
+
+    # The centroid is a good first guess for most shapes, the bounding box centre for thin ones
+    cx, cy = _centroid(polygon[0])
+    best = (_signed_distance(cx, cy, edges), cx, cy)
+    bx, by = (min_x + max_x) / 2, (min_y + max_y) / 2
+    best = max(best, (_signed_distance(bx, by, edges), bx, by))
+
+    while queue:
+        potential, distance, x, y, half = heapq.heappop(queue)
+        if distance > best[0]:
+            best = (distance, x, y)
+        if -potential - best[0] <= precision:
+            continue
+        half /= 2
+        for dx in (-half, half):
+            for dy in (-half, half):
+                push(x + dx, y + dy, half)
+    return best[1], best[2]
+
+def label_point(geometry, relative_precision: float = 0.01):
+    """
+    [lon, lat] for a Polygon or MultiPolygon's label: the pole of inaccessibility of its
+    largest polygon, computed in Web Mercator so it sits where the map draws the country,
+    to within `relative_precision` of the polygon's extent. None for other geometry types.
+    """
+    if not geometry:
+        return None
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry.get("coordinates") or []]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry.get("coordinates") or []
+    else:
+        return None
+    projected = [
+        [[(lon, _mercator_y(lat)) for lon, lat, *_ in ring] for ring in polygon]
+        for polygon in polygons if polygon and polygon[0]
+    ]
+    if not projected:
+        return None
+    largest = max(projected, key=lambda polygon: _ring_area(polygon[0]))
+    xs = [x for x, _ in largest[0]]
+    ys = [y for _, y in largest[0]]
+    extent = max(max(xs) - min(xs), max(ys) - min(ys))
+    x, y = pole_of_inaccessibility(largest, extent * relative_precision)
+    return [round(x, 4), round(_mercator_lat(y), 4)]
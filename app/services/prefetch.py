@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import math
+import time
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.countries import CountryService
+from app.services.economic_data import EconomicDataService
+from app.services.geo_data import GeoDataService
+
+class DecayingCounter:
+    """Request counts per key that halve every `half_life` seconds without traffic"""
+
+    def __init__(self, half_life: float):
+        self.decay = math.log(2) / half_life
+        self._scores = {}
+        self._prune_at = 64
+
+    def _score(self, key, now: float) -> float:
+        score, updated = self._scores.get(key, (0.0, now))
+        return score * math.exp(-self.decay * (now - updated))
+
+    def hit(self, key, now: float = None):
+        now = time.time() if now is None else now
+        self._scores[key] = (self._score(key, now) + 1.0, now)
+        if len(self._scores) > self._prune_at:
+            # Forget keys whose score has decayed to nothing
+            self._scores = {k: entry for k, entry in self._scores.items() if self._score(k, now) >= 0.01}
+            self._prune_at = max(64, 2 * len(self._scores))
+
+    def top(self, n: int, now: float = None):
+        """The n keys with the highest current score, highest first; the counts are not changed"""
+        now = time.time() if now is None else now
+        scores = {key: self._score(key, now) for key in self._scores}
+        live = [key for key, score in scores.items() if score >= 0.01]
+        return sorted(live, key=scores.get, reverse=True)[:n]
+
+class UpstreamBudget:
+    """Token bucket of upstream requests prefetching may spend, refilled per minute"""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def spend(self, cost: int) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+
+class ProfilePrefetcher:
+    """
+    Keeps the most requested country profiles, and the neighbours of the country just
+    requested, in the World Bank cache. Only indicators that are not already cached count
+    against the upstream request budget; work that does not fit is skipped. State is per
+    worker process.
+    """
+
+    def __init__(self, top_n: int, budget_per_minute: int, half_life: float, interval: float):
+        self.top_n = top_n
+        self.interval = interval
+        self.counter = DecayingCounter(half_life)
+        self.budget = UpstreamBudget(budget_per_minute)
+        self.warmed = 0
+        self.skipped = 0
+        self._inflight = set()
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0
+
+    def record(self, country_code: str):
+        """Count a profile request and warm the country's neighbours in the background"""
+        if not self.enabled:
+            return
+        self.counter.hit(country_code.upper())
+        self._spawn(self._warm_neighbours(country_code.upper()))
+
+    def _spawn(self, coro):
+        # Run outside the request's context, so prefetching is not traced as part of it
+        task = contextvars.Context().run(asyncio.create_task, coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _service(self):
+        return EconomicDataService(CountryService(), GeoDataService())
+
+    def _profile_indicators(self, service):
+        return list(service.indicators.values()) + list(service.sector_indicators.values())
+
+    async def warm(self, country_code: str, margin: float = 0) -> bool:
+        """Load a profile's indicators if they fit in the budget; True when it was fetched"""
+        if country_code in self._inflight:
+            return False
+        service = self._service()
+        missing = [
+            indicator for indicator in self._profile_indicators(service)
+            if not service.is_cached(country_code, indicator, margin)
+        ]
+        if not missing:
+            return False
+        if not self.budget.spend(len(missing)):
+            self.skipped += 1
+            return False
+        self._inflight.add(country_code)
+        try:
+            await asyncio.gather(*[service.fetch_world_bank_data(country_code, i) for i in missing])
+            self.warmed += 1
+            return True
+        finally:
+            self._inflight.discard(country_code)
+
+    async def _warm_neighbours(self, country_code: str):
+        try:
+            country = await CountryService().get_country_data(country_code)
+            if not country:
+                return
+            for border in country.borders:
+                # Borders are alpha-3 codes; profiles are cached under alpha-2
+                neighbour = await CountryService().get_country_data(border)
+                if neighbour:
+                    await self.warm(neighbour.code)
+        except Exception as e:
+            logger.error(f"Error prefetching neighbours of {country_code}: {str(e)}")
+
+    async def run(self):
+        """Periodically re-warm the hottest profiles before their cache entries expire"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                warmed = [code for code in self.counter.top(self.top_n) if await self.warm(code, margin=self.interval)]
+                if warmed:
+                    logger.info(f"Prefetched profiles: {', '.join(warmed)}")
+            except Exception as e:
+                logger.error(f"Error prefetching profiles: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "hot": self.counter.top(self.top_n),
+            "warmed": self.warmed,
+            "skipped_over_budget": self.skipped,
+            "budget_remaining": int(self.budget.tokens)
+        }
+
+profile_prefetcher = ProfilePrefetcher(
+    top_n=settings.PREFETCH_TOP_N,
+    budget_per_minute=settings.PREFETCH_BUDGET,
+    half_life=settings.PREFETCH_HALF_LIFE,
+    interval=settings.PREFETCH_INTERVAL
+)
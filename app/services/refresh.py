@@ -0,0 +1,151 @@
+import asyncio
+from app.core.logging import logger
+from app.services.countries import CountryService
+from app.services.data_events import data_events
+from app.services.economic_data import EconomicDataService
+from app.services.flags import FlagSpriteService
+from app.services.geo_data import GeoDataService
+
+class DataRefresher:
+    """
+    Periodically revalidates the upstream datasets so changes are published to subscribers.
+    Unchanged datasets answer 304 or hash the same, and nothing derived from them is rebuilt.
+    """
+
+    def __init__(self, interval: int, shared=None):
+        self.interval = interval
+        # When set, every refresh also publishes the datasets to this SharedDataset
+        self.shared = shared
+        self._published_digests = None
+
+    async def warm(self):
+        """Load every dataset and build its derived artifacts, using local caches where present"""
+        country_service = CountryService()
+        geo_service = GeoDataService()
+        results = await asyncio.gather(
+            country_service.fetch_countries(),
+            geo_service.fetch_geojson(),
+            return_exceptions=True
+        )
+        for name, result in zip(("countries", "geometry"), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error loading {name} data: {str(result)}")
+        await self.build_artifacts(country_service, geo_service)
+        await self.publish(country_service, geo_service)
+
+    async def refresh(self):
+        """Refresh the countries and geometry datasets once"""
+        country_service = CountryService()
+        geo_service = GeoDataService()
+        results = await asyncio.gather(
+            country_service.fetch_countries(force_refresh=True),
+            geo_service.fetch_geojson(force_refresh=True),
+            return_exceptions=True
+        )
+        for name, result in zip(("countries", "geometry"), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error refreshing {name} data: {str(result)}")
+
+        # Rebuild derived artifacts now rather than on the next request; each is a cache hit
+        # unless its input digest changed
+        await self.build_artifacts(country_service, geo_service, force_refresh=True)
+        await self.publish(country_service, geo_service)
+
+    async def build_artifacts(self, country_service, geo_service, force_refresh=False):
+        economic_service = EconomicDataService(country_service, geo_service)
+        results = await asyncio.gather(
+            country_service.get_african_capitals_by_region(),
+            country_service.get_capital_index(),
+            # Read from shared memory when it is published, so workers keep no private copy
+            geo_service.get_map_data_snapshot(),
+            geo_service.get_spatial_index(),
+            # Refetches the indicators in bulk when forced
+            economic_service.get_economic_index(force_refresh=force_refresh),
+            FlagSpriteService(country_service).get_sprite(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error building derived data: {str(result)}")
+
+    async def publish(self, country_service, geo_service):
+        """Publish countries' indicators, capital coordinates and map data to shared memory if any changed"""
+        if self.shared is None:
+            return
+        try:
+            countries = await country_service.fetch_countries()
+            geojson_digest, map_data = await geo_service.build_map_data_snapshot()
+            economic_service = EconomicDataService(country_service, geo_service)
+            # The table build_artifacts just fetched, not the one this process last published
+            table = await economic_service.get_indicator_table([c.code for c in countries], use_shared=False)
+        except Exception as e:
+            logger.error(f"Error preparing shared dataset: {str(e)}")
+            return
+
+        digests = (country_service.countries_digest, geojson_digest, table.digest())
+        if digests == self._published_digests:
+            return
+        self.shared.publish(
+            table,
+            [(c.code, *c.capital_latlng) for c in countries if c.capital_latlng],
+            map_data,
+            countries_digest=country_service.countries_digest,
+            geojson_digest=geojson_digest
+        )
+        self._published_digests = digests
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            logger.info("Refreshing upstream datasets")
+            await self.refresh()
+
+class SharedDatasetWatcher:
+    """
+    Forwards the changes the refresher process publishes to shared memory to this worker's
+    /api/v1/events subscribers. Workers reading a shared dataset do not refresh themselves,
+    so their event streams would otherwise never see an update.
+    """
+
+    def __init__(self, shared, interval: float = 1.0):
+        self.shared = shared
+        self.interval = interval
+        self._version = None
+        self._digests = (None, None, None)
+
+    async def check(self):
+        """Publish events for whatever changed since the last version this worker saw"""
+        view = self.shared.current()
+        if view is None or view.version == self._version:
+            return
+        self._version = view.version
+        # Before recording, so the events below carry the shared version too
+        data_events.follow_version(view.version)
+        countries_digest, geojson_digest, indicators_digest = self._digests
+        self._digests = (view.countries_digest, view.geojson_digest, view.indicators.digest())
+
+        if view.countries_digest != countries_digest and countries_digest is not None:
+            # The segment holds capitals only; the worker revalidates its own country list,
+            # which publishes the changed countries
+            await CountryService().fetch_countries(force_refresh=True)
+        if view.geojson_digest != geojson_digest:
+            # Loads the published geometry and publishes the changed features
+            await GeoDataService().fetch_geojson()
+        if self._digests[2] != indicators_digest:
+            table = view.indicators
+            data_events.record(
+                "indicators",
+                {
+                    f"{code}:{indicator}": table.lookup(code, indicator)
+                    for code in table.codes for indicator in table.indicators
+                },
+                complete=False
+            )
+
+    async def run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Error following shared dataset: {str(e)}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,200 @@
+import json
+import os
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.indicator_table import IndicatorTable
+
+# Segment layout: header, then 8-byte aligned sections (manifest JSON, float64 indicator
+# matrix, float64 capital lat/lon pairs, serialized map-data GeoJSON)
+HEADER = struct.Struct("<4sIQ8Q")
+MAGIC = b"ACDS"
+FORMAT_VERSION = 1
+POINTER = struct.Struct("<Q")
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def _attach(name: str):
+    """Attach an existing segment without letting this process's resource tracker unlink it on exit"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+class SharedDatasetView:
+    """
+    Read-only view of one published segment. Values are read in place through memoryviews,
+    so attaching costs no copy of the indicator matrix, coordinates or GeoJSON.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        buf = shm.buf
+        magic, fmt, self.version, *sections = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shared dataset segment {shm.name}")
+        (manifest_at, manifest_len, indicators_at, indicators_len,
+         capitals_at, capitals_len, map_data_at, map_data_len) = sections
+
+        manifest = json.loads(bytes(buf[manifest_at:manifest_at + manifest_len]))
+        self.countries_digest = manifest["countries_digest"]
+        self.geojson_digest = manifest["geojson_digest"]
+        self._views = [
+            buf[indicators_at:indicators_at + indicators_len].cast("d"),
+            buf[capitals_at:capitals_at + capitals_len].cast("d"),
+            buf[map_data_at:map_data_at + map_data_len]
+        ]
+        indicator_values, coords, self.map_data = self._views
+        self._map_data_bytes = None
+        self.indicators = IndicatorTable(manifest["codes"], manifest["indicators"], values=indicator_values)
+        self.capitals = {
+            code: (coords[2 * i], coords[2 * i + 1])
+            for i, code in enumerate(manifest["capital_codes"])
+        }
+
+    @property
+    def map_data_bytes(self) -> bytes:
+        """
+        The serialized GeoJSON as bytes, copied once per version. Responses need bytes they
+        can hold after the view is released, so they cannot use the memoryview itself.
+        """
+        if self._map_data_bytes is None:
+            self._map_data_bytes = bytes(self.map_data)
+        return self._map_data_bytes
+
+    def release(self):
+        self._map_data_bytes = None
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._shm.close()
+
+class SharedDataset:
+    """
+    Versioned shared-memory segments holding the datasets every worker reads.
+
+    One process publishes a new segment per data version and points the small
+    `<prefix>-current` segment at it. Workers check the pointer on each access
+    and attach the newest version.
+    """
+
+    def __init__(self, name: str):
+        # The prefix is fixed in the parent process, so forked workers use the same names
+        self.prefix = f"{name}-{os.getpid()}"
+        self.enabled = False
+        self._pointer = None
+        self._view = None
+        self._published = {}
+
+    def _segment_name(self, version: int) -> str:
+        return f"{self.prefix}-{version}"
+
+    def _open_pointer(self, create: bool = False):
+        if self._pointer is None:
+            name = f"{self.prefix}-current"
+            try:
+                self._pointer = _attach(name)
+            except FileNotFoundError:
+                if not create:
+                    return None
+                self._pointer = shared_memory.SharedMemory(name=name, create=True, size=POINTER.size)
+                POINTER.pack_into(self._pointer.buf, 0, 0)
+        return self._pointer
+
+    def published_version(self) -> int:
+        pointer = self._open_pointer()
+        return POINTER.unpack_from(pointer.buf, 0)[0] if pointer else 0
+
+    def publish(self, indicators: IndicatorTable, capitals, map_data: bytes, countries_digest, geojson_digest) -> int:
+        """
+        Write a new segment and make it current. `capitals` is a list of (code, lat, lon).
+        """
+        pointer = self._open_pointer(create=True)
+        version = POINTER.unpack_from(pointer.buf, 0)[0] + 1
+
+        manifest = json.dumps({
+            "codes": indicators.codes,
+            "indicators": indicators.indicators,
+            "capital_codes": [code for code, _, _ in capitals],
+            "countries_digest": countries_digest,
+            "geojson_digest": geojson_digest
+        }).encode("utf-8")
+        indicator_bytes = array("d", indicators.values).tobytes()
+        capital_bytes = array("d", [v for _, lat, lon in capitals for v in (lat, lon)]).tobytes()
+
+        sections = []
+        offset = _align(HEADER.size)
+        for data in (manifest, indicator_bytes, capital_bytes, map_data):
+            sections.append((offset, len(data), data))
+            offset = _align(offset + len(data))
+
+        shm = shared_memory.SharedMemory(name=self._segment_name(version), create=True, size=max(offset, 1))
+        HEADER.pack_into(
+            shm.buf, 0, MAGIC, FORMAT_VERSION, version,
+            *[value for at, length, _ in sections for value in (at, length)]
+        )
+        for at, length, data in sections:
+            shm.buf[at:at + length] = data
+        shm.close()
+
+        # Make it current, then drop the version before the previous one; readers still
+        # attached to an unlinked segment keep their mapping until they move on
+        POINTER.pack_into(pointer.buf, 0, version)
+        self._published[version] = self._segment_name(version)
+        self._unlink(version - 2)
+        self.enabled = True
+        logger.info(f"Published shared dataset version {version} ({offset} bytes)")
+        return version
+
+    def _unlink(self, version: int):
+        name = self._published.pop(version, None)
+        if not name:
+            return
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+            shm.unlink()
+            shm.close()
+        except FileNotFoundError:
+            pass
+
+    def current(self):
+        """The view of the newest published segment, or None when nothing is published"""
+        if not self.enabled:
+            return None
+        version = self.published_version()
+        if not version:
+            return None
+        if self._view is None or self._view.version != version:
+            try:
+                view = SharedDatasetView(_attach(self._segment_name(version)))
+            except (FileNotFoundError, ValueError) as e:
+                logger.error(f"Error attaching shared dataset version {version}: {str(e)}")
+                return self._view
+            if self._view is not None:
+                self._view.release()
+            self._view = view
+        return self._view
+
+    def unlink_all(self):
+        """Remove every segment this process published, and the pointer"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        for version in list(self._published):
+            self._unlink(version)
+        for version in range(1, self.published_version() + 1):
+            try:
+                shared_memory.SharedMemory(name=self._segment_name(version)).unlink()
+            except FileNotFoundError:
+                pass
+        if self._pointer is not None:
+            self._pointer.unlink()
+            self._pointer.close()
+            self._pointer = None
+
+shared_dataset = SharedDataset(settings.SHARED_DATASET_NAME)
@@ -0,0 +1,135 @@
+import math
+from array import array
+
+class SpatialIndex:
+    """
+    Uniform grid over country bounding boxes for point-in-country lookups.
+
+    Grid cells that no polygon edge passes through lie entirely inside one country
+    (or none), so they are resolved once at build time. Only cells on a border
+    need an even-odd ray casting test against the candidate countries.
+    """
+
+    def __init__(self, features, cell_size: float = 1.0):
+        self.cell_size = cell_size
+        self.countries = []
+        self._rings = []
+        self._bboxes = []
+        self._candidates = {}
+        self._resolved = {}
+
+        for feature in features:
+            rings = self._feature_rings(feature.get("geometry") or {})
+            if not rings:
+                continue
+            properties = feature.get("properties", {})
+            code = properties.get("ISO_A2")
+            if not code or code == "-99":
+                code = properties.get("ADM0_A3")
+            self.countries.append({
+                "code": code,
+                "iso_a3": properties.get("ISO_A3") if properties.get("ISO_A3") != "-99" else properties.get("ADM0_A3"),
+                "name": properties.get("NAME")
+            })
+            self._rings.append(rings)
+            self._bboxes.append(self._rings_bbox(rings))
+
+        self._build_grid()
+
+    @staticmethod
+    def _feature_rings(geometry):
+        """Flatten Polygon/MultiPolygon rings into arrays of interleaved lon, lat values"""
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry.get("coordinates", [])]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry.get("coordinates", [])
+        else:
+            return []
+        rings = []
+        for polygon in polygons:
+            for ring in polygon:
+                flat = array("d")
+                for lon, lat, *_ in ring:
+                    flat.append(lon)
+                    flat.append(lat)
+                rings.append(flat)
+        return rings
+
+    @staticmethod
+    def _rings_bbox(rings):
+        lons = [v for ring in rings for v in ring[0::2]]
+        lats = [v for ring in rings for v in ring[1::2]]
+        return (min(lons), min(lats), max(lons), max(lats))
+
+    def _cell(self, lon, lat):
+        return (math.floor(lon / self.cell_size), math.floor(lat / self.cell_size))
+
+    def _build_grid(self):
+        border_cells = set()
+        for idx, (rings, (min_lon, min_lat, max_lon, max_lat)) in enumerate(zip(self._rings, self._bboxes)):
+            x0, y0 = self._cell(min_lon, min_lat)
+            x1, y1 = self._cell(max_lon, max_lat)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    self._candidates.setdefault((x, y), []).append(idx)
+
+            # Mark every cell a polygon edge may touch (conservatively, by the edge's bounding box)
+            for ring in rings:
+                for i in range(0, len(ring) - 2, 2):
+                    ex0, ey0 = self._cell(min(ring[i], ring[i + 2]), min(ring[i + 1], ring[i + 3]))
+                    ex1, ey1 = self._cell(max(ring[i], ring[i + 2]), max(ring[i + 1], ring[i + 3]))
+                    for x in range(ex0, ex1 + 1):
+                        for y in range(ey0, ey1 + 1):
+                            border_cells.add((x, y))
+
+        # Cells away from any border have the same answer everywhere, so test their centre once
+        half = self.cell_size / 2
+        for cell, candidates in self._candidates.items():
+            if cell in border_cells:
+                continue
+            lon = cell[0] * self.cell_size + half
+            lat = cell[1] * self.cell_size + half
+            self._resolved[cell] = next(
+                (idx for idx in candidates if self._contains(idx, lon, lat)),
+                None
+            )
+
+    def _contains(self, idx, lon, lat):
+        min_lon, min_lat, max_lon, max_lat = self._bboxes[idx]
+        if lon < min_lon or lon > max_lon or lat < min_lat or lat > max_lat:
+            return False
+        inside = False
+        for ring in self._rings[idx]:
+            n = len(ring)
+            xj, yj = ring[n - 2], ring[n - 1]
+            for i in range(0, n, 2):
+                xi, yi = ring[i], ring[i + 1]
+                if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+                    inside = not inside
+                xj, yj = xi, yi
+        return inside
+
+    def locate_index(self, lat: float, lon: float):
+        """Return the position of the country containing the point in `countries`, or None"""
+        cell = self._cell(lon, lat)
+        if cell in self._resolved:
+            return self._resolved[cell]
+        for idx in self._candidates.get(cell, ()):
+            if self._contains(idx, lon, lat):
+                return idx
+        return None
+
+    def locate(self, lat: float, lon: float):
+        """Return the country containing the point, or None"""
+        idx = self.locate_index(lat, lon)
+        return self.countries[idx] if idx is not None else None
+
+    def locate_many(self, points):
+        """Return the country code for each (lat, lon) point, None where no country matches"""
+        locate_index = self.locate_index
+        codes = [country["code"] for country in self.countries]
+        results = []
+        for lat, lon in points:
+            idx = locate_index(lat, lon)
+            results.append(codes[idx] if idx is not None else None)
+        return results
@@ -0,0 +1,72 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class UpstreamResponse:
+    """
+    Result of a conditional upstream GET. `content` is None when the upstream answered 304.
+    """
+    content: Optional[bytes]
+    digest: str
+    changed: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    key: Optional[str] = None
+
+class ConditionalFetcher:
+    """
+    Remembers the validators (ETag / Last-Modified) and content digest of each upstream
+    resource, so refreshes send conditional requests and unchanged payloads are detected
+    without reparsing them.
+
+    Validators from a new response are only kept once the caller `commit`s it, after the
+    content has been used successfully. Otherwise a payload that failed to parse would be
+    answered with 304 on the next request, and never fetched again.
+    """
+
+    def __init__(self):
+        self._validators = {}
+
+    def validators(self, key: str):
+        """The (etag, last_modified, digest) last seen for a resource, or None"""
+        return self._validators.get(key)
+
+    def seed(self, key: str, digest: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Restore validators persisted by a previous process"""
+        self._validators[key] = (etag, last_modified, digest)
+
+    def commit(self, response: UpstreamResponse):
+        """Keep the validators of a response whose content was used"""
+        self._validators[response.key] = (response.etag, response.last_modified, response.digest)
+
+    def forget(self, key: str):
+        self._validators.pop(key, None)
+
+    def clear(self):
+        self._validators.clear()
+
+    async def fetch(self, client, url: str, params: Optional[dict] = None, key: Optional[str] = None) -> UpstreamResponse:
+        key = key or url
+        known = self._validators.get(key)
+        headers = {}
+        if known:
+            etag, last_modified, _ = known
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = await client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and known:
+            etag, last_modified, digest = known
+            return UpstreamResponse(None, digest, False, etag, last_modified, key)
+        response.raise_for_status()
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        return UpstreamResponse(content, digest, known is None or known[2] != digest, etag, last_modified, key)
+
+upstream = ConditionalFetcher()
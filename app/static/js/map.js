@@ -19,6 +19,9 @@ L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/
 // Store country data and GeoJSON layers
 let countriesData = {};
 let countryLayers = {};
+let dataVersion = null;
+let flagSprite = null;
+const countriesLayerGroup = L.layerGroup().addTo(map);
 
 // Format numbers with commas
 function formatNumber(num) {
@@ -50,9 +53,9 @@ function updateCountryInfo(countryData) {
         ? `${countryData.economy.gdp_growth.toFixed(1)}%`
         : 'N/A';
 
-    // Get flag URL
-    const flagUrl = countryData.country.code
-        ? `https://flagcdn.com/64x48/${countryData.country.code.toLowerCase()}.png`
+    const flag = countryData.country.code
+        ? flagHtml(countryData.country.code, 1, `Flag of ${countryData.country.name}`,
+            'float:right;margin:0 0 10px 10px;border:1px solid #ddd;')
         : '';
 
     // Generate sectors HTML if available
@@ -74,8 +77,7 @@ function updateCountryInfo(countryData) {
     // Update the info div with all country information
     infoDiv.innerHTML = `
         <div class="country-details">
-            ${flagUrl ? `<img src="${flagUrl}" alt="Flag of ${countryData.country.name}" 
-                style="float:right;margin:0 0 10px 10px;border:1px solid #ddd;">` : ''}
+            ${flag}
             <h4>${countryData.country.name}</h4>
             <p><strong>Capital:</strong> ${countryData.country.capital}</p>
             <p><strong>Region:</strong> ${countryData.country.region}</p>
@@ -93,26 +95,122 @@ function updateCountryInfo(countryData) {
 // Add a base URL constant at the top of your file
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
-// Fetch and display country profile
-function fetchCountryProfile(countryCode) {
-    // Always fetch fresh data to ensure up-to-date info
-    fetch(`${API_BASE_URL}/country-profile/${countryCode}`)
-        .then(resp => resp.json())
-        .then(profile => {
-            countriesData[countryCode] = profile;
-            updateCountryInfo(profile);
+// Load the flag sprite manifest; every flag then comes from one image instead of one request each
+function loadFlagSprite() {
+    return fetch(`${API_BASE_URL}/flags/manifest.json`)
+        .then(resp => resp.ok ? resp.json() : null)
+        .then(manifest => {
+            flagSprite = manifest
+                ? {manifest, url: `${API_BASE_URL}/flags/sprite.svg?v=${manifest.version}`}
+                : null;
         })
         .catch(error => {
-            console.error('Error fetching country profile:', error);
-            updateCountryInfo(null);
+            console.error('Error fetching flag sprite manifest:', error);
+            flagSprite = null;
+        });
+}
+
+// A flag at `scale` times the sprite's 64x48 size, from the sprite or, for countries it lacks, flagcdn
+function flagHtml(countryCode, scale, title, style = '') {
+    const width = 64 * scale;
+    const height = 48 * scale;
+    const offset = flagSprite?.manifest.flags[countryCode];
+    if (!offset) {
+        return `<img src="https://flagcdn.com/64x48/${countryCode.toLowerCase()}.png" alt="${title}" ` +
+            `width="${width}" height="${height}" style="${style}">`;
+    }
+    const {width: spriteWidth, height: spriteHeight} = flagSprite.manifest;
+    return `<div role="img" aria-label="${title}" style="${style}width:${width}px;height:${height}px;` +
+        `background:url('${flagSprite.url}') ${-offset[0] * scale}px ${-offset[1] * scale}px / ` +
+        `${spriteWidth * scale}px ${spriteHeight * scale}px no-repeat;"></div>`;
+}
+
+// Fetch a country profile, served from the local cache until the server reports a change
+function loadCountryProfile(countryCode) {
+    if (countriesData[countryCode]) {
+        return Promise.resolve(countriesData[countryCode]);
+    }
+    return fetch(`${API_BASE_URL}/country-profile/${countryCode}`)
+        .then(resp => {
+            // Errors (404, or 429/503 while the server sheds load) are shown but never cached
+            if (!resp.ok) throw new Error(`Country profile request failed with status ${resp.status}`);
+            return resp.json();
+        })
+        .then(profile => {
+            countriesData[countryCode] = profile;
+            return profile;
         });
 }
 
+function showProfileError(error) {
+    console.error('Error fetching country profile:', error);
+    document.getElementById('country-info').innerHTML =
+        '<p>Could not load data for this country. Please try again later.</p>';
+}
+
+// Fetch and display country profile
+function fetchCountryProfile(countryCode) {
+    loadCountryProfile(countryCode)
+        .then(profile => updateCountryInfo(profile))
+        .catch(showProfileError);
+}
+
+// Drop cached profiles for the given country codes and refresh the one on display
+function invalidateProfiles(countryCodes) {
+    const selectedCode = document.getElementById('country-select')?.value;
+    let refreshSelected = false;
+    for (const code of countryCodes) {
+        delete countriesData[code];
+        if (code === selectedCode) refreshSelected = true;
+    }
+    if (refreshSelected) fetchCountryProfile(selectedCode);
+}
+
+// Subscribe to data update notifications so cached data is only refetched when it changes
+function subscribeToDataEvents() {
+    if (!window.EventSource) return;
+    const source = new EventSource(`${API_BASE_URL}/events`);
+
+    source.addEventListener('version', event => {
+        const snapshot = JSON.parse(event.data);
+        if (dataVersion !== null && snapshot.version !== dataVersion) {
+            // Missed updates while disconnected
+            invalidateProfiles(Object.keys(countriesData));
+            fetchMapData();
+        }
+        dataVersion = snapshot.version;
+    });
+
+    source.addEventListener('update', event => {
+        const update = JSON.parse(event.data);
+        dataVersion = update.version;
+        const keys = update.changed.concat(update.removed);
+        if (update.dataset === 'geometry') {
+            fetchMapData();
+        } else if (update.dataset === 'indicators') {
+            // Indicator keys look like "KE:NY.GDP.MKTP.CD"
+            invalidateProfiles(new Set(keys.map(key => key.split(':')[0])));
+        } else {
+            invalidateProfiles(keys);
+        }
+    });
+
+    source.addEventListener('resync', event => {
+        dataVersion = JSON.parse(event.data).version;
+        invalidateProfiles(Object.keys(countriesData));
+        fetchMapData();
+    });
+}
+
 // Fetch map data and initialize countries layers
 function fetchMapData() {
-    fetch(`${API_BASE_URL}/map-data`)
-        .then(response => response.json())
-        .then(data => {
+    Promise.all([
+        fetch(`${API_BASE_URL}/map-data`).then(response => response.json()),
+        loadFlagSprite()
+    ])
+        .then(([data]) => {
+            countriesLayerGroup.clearLayers();
+            countryLayers = {};
             L.geoJSON(data, {
                 onEachFeature: (feature, layer) => {
                     const iso2 = feature.properties.ISO_A2;
@@ -121,26 +219,30 @@ function fetchMapData() {
                     const countryCode = iso2.toUpperCase();
                     countryLayers[countryCode] = layer;
                     
-                    // Show country name as tooltip
+                    // The server places labels at the point farthest from the border, which
+                    // stays inside concave countries; fall back to the bounding box centre
+                    const labelPoint = feature.properties.LABEL_POINT;
+                    const anchor = labelPoint
+                        ? L.latLng(labelPoint[1], labelPoint[0])
+                        : layer.getBounds().getCenter();
+
+                    // Flag just above the anchor, country name just below it
                     const countryName = feature.properties.NAME;
-                    layer.bindTooltip(`<strong>${countryName}</strong>`, {
-                        direction: 'center',
-                        permanent: true,
-                        className: 'country-label'
-                    });
-                    
-                    // Add flag marker at centroid
-                    const centroid = layer.getBounds().getCenter();
-                    const flagUrl = `https://flagcdn.com/32x24/${countryCode.toLowerCase()}.png`;
-                    const flagIcon = L.icon({
-                        iconUrl: flagUrl,
+                    const flagIcon = L.divIcon({
+                        html: flagHtml(countryCode, 0.5, `Flag of ${countryName}`),
+                        className: 'flag-marker',
                         iconSize: [32, 24],
-                        iconAnchor: [16, 12],
-                        popupAnchor: [0, -12]
+                        iconAnchor: [16, 24]
                     });
-                    L.marker(centroid, {icon: flagIcon, title: countryName, interactive: false}).addTo(map);
+                    L.marker(anchor, {icon: flagIcon, title: countryName, interactive: false})
+                        .bindTooltip(`<strong>${countryName}</strong>`, {
+                            direction: 'bottom',
+                            permanent: true,
+                            className: 'country-label'
+                        })
+                        .addTo(countriesLayerGroup);
                 }
-            }).addTo(map);
+            }).addTo(countriesLayerGroup);
             
             // Populate select after map is loaded
             populateCountrySelect();
@@ -153,6 +255,7 @@ function fetchMapData() {
 // Populate country select dropdown
 function populateCountrySelect() {
     const select = document.getElementById('country-select');
+    const selectedCode = select.value;
     // Clear existing options
     select.innerHTML = '<option value="">Select a country...</option>';
     
@@ -171,11 +274,16 @@ function populateCountrySelect() {
         option.textContent = name;
         select.appendChild(option);
     }
+    // Keep the selection when the map data is reloaded
+    if (selectedCode && countryLayers[selectedCode]) {
+        select.value = selectedCode;
+    }
 }
 
 // Initialize on document ready
 document.addEventListener('DOMContentLoaded', function() {
     fetchMapData();
+    subscribeToDataEvents();
 
     const countrySelect = document.getElementById('country-select');
     if (countrySelect) {
@@ -189,10 +297,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Zoom to country
                 map.fitBounds(countryLayers[selectedCode].getBounds());
                 // Fetch and display country data
-                fetch(`/api/v1/country-profile/${selectedCode}`)
-                    .then(response => response.json())
+                loadCountryProfile(selectedCode)
                     .then(profile => {
-                        countriesData[selectedCode] = profile;
                         updateCountryInfo(profile);
                         // Highlight selected country
                         Object.values(countryLayers).forEach(layer => {
@@ -202,7 +308,8 @@ document.addEventListener('DOMContentLoaded', function() {
                             weight: 2,
                             color: '#ff7800'
                         });
-                    });
+                    })
+                    .catch(showProfileError);
             }
         });
     }
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import unittest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.middleware.admission import (
+    AdmissionMiddleware, ConcurrencyPool, Overloaded, RateLimiter, TokenBucket,
+    PRIORITY_HIGH, PRIORITY_LOW, classify
+)
+
+class AdmissionTestCase(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify("GET", "/api/v1/economic-data"), ("expensive", PRIORITY_LOW))
+        self.assertEqual(classify("GET", "/api/v1/economic-data/KE"), ("expensive", PRIORITY_HIGH))
+        self.assertEqual(classify("GET", "/api/v1/locate")[0], "cheap")
+        self.assertEqual(classify("POST", "/api/v1/locate")[0], "expensive")
+        self.assertEqual(classify("GET", "/api/v1/events"), (None, None))
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=1.0, burst=2, now=0.0)
+        self.assertEqual(bucket.take(0.0), 0)
+        self.assertEqual(bucket.take(0.0), 0)
+        self.assertAlmostEqual(bucket.take(0.0), 1.0)
+        self.assertEqual(bucket.take(1.0), 0)
+
+    def test_pool_admits_by_priority_and_sheds(self):
+        async def scenario():
+            pool = ConcurrencyPool("test", limit=1, queue_size=2, max_wait=1.0)
+            await pool.acquire(PRIORITY_LOW)
+            order = []
+
+            async def waiter(name, priority):
+                try:
+                    await pool.acquire(priority)
+                except Overloaded:
+                    order.append(f"{name} shed")
+                    return
+                order.append(name)
+                pool.release()
+
+            low = asyncio.create_task(waiter("low", PRIORITY_LOW))
+            await asyncio.sleep(0)
+            high = asyncio.create_task(waiter("high", PRIORITY_HIGH))
+            await asyncio.sleep(0)
+            # The queue is full, so this one displaces the queued low-priority request
+            urgent = asyncio.create_task(waiter("urgent", PRIORITY_HIGH))
+            await asyncio.sleep(0)
+            pool.release()
+            await asyncio.gather(low, high, urgent)
+            self.assertEqual(order, ["low shed", "high", "urgent"])
+            self.assertEqual(pool.active, 0)
+
+        asyncio.run(scenario())
+
+    def test_pool_sheds_after_max_wait(self):
+        async def scenario():
+            pool = ConcurrencyPool("test", limit=1, queue_size=4, max_wait=0.05)
+            await pool.acquire(PRIORITY_HIGH)
+            with self.assertRaises(Overloaded):
+                await pool.acquire(PRIORITY_HIGH)
+            self.assertEqual(pool.queued, 0)
+            pool.release()
+            self.assertEqual(pool.active, 0)
+
+        asyncio.run(scenario())
+
+    def test_rate_limited_client_gets_429(self):
+        app = FastAPI()
+
+        @app.get("/api/v1/african-capitals")
+        async def capitals():
+            return {"ok": True}
+
+        app.add_middleware(AdmissionMiddleware, rate_limiter=RateLimiter(requests=2, window=60))
+        client = TestClient(app)
+        self.assertEqual(client.get("/api/v1/african-capitals").status_code, 200)
+        response = client.get("/api/v1/african-capitals")
+        self.assertEqual(response.headers["x-rate-limit-remaining"], "0")
+        response = client.get("/api/v1/african-capitals")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["retry-after"]), 1)
+
+    def test_only_health_check_token_skips_rate_limit(self):
+        app = FastAPI()
+
+        @app.get("/api/v1/african-capitals")
+        async def capitals(request: Request):
+            return {"health_check": getattr(request.state, "health_check", False)}
+
+        app.add_middleware(
+            AdmissionMiddleware,
+            rate_limiter=RateLimiter(requests=1, window=60),
+            health_check_token="secret"
+        )
+        # A loopback address (possibly taken from a spoofed X-Forwarded-For) earns nothing
+        client = TestClient(app, client=("127.0.0.1", 50000))
+        self.assertEqual(client.get("/api/v1/african-capitals").status_code, 200)
+        self.assertEqual(client.get("/api/v1/african-capitals").status_code, 429)
+        self.assertEqual(
+            client.get("/api/v1/african-capitals", headers={"X-Health-Check": "guess"}).status_code, 429
+        )
+
+        response = client.get("/api/v1/african-capitals", headers={"X-Health-Check": "secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"health_check": True})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import random
+import unittest
+from app.services.capital_index import CapitalIndex, haversine_km
+
+class CapitalIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(42)
+        cls.capitals = [
+            {"code": f"C{i}", "country": f"Country {i}", "capital": f"Capital {i}",
+             "lat": rng.uniform(-35, 37), "lon": rng.uniform(-18, 52)}
+            for i in range(60)
+        ]
+        cls.index = CapitalIndex(cls.capitals, version=1)
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            lat, lon = rng.uniform(-40, 40), rng.uniform(-25, 60)
+            expected = sorted(self.capitals, key=lambda c: haversine_km(lat, lon, c["lat"], c["lon"]))[:3]
+            result = self.index.nearest(lat, lon, k=3)
+            self.assertEqual([c["code"] for c, _ in result], [c["code"] for c in expected])
+            self.assertAlmostEqual(result[0][1], haversine_km(lat, lon, expected[0]["lat"], expected[0]["lon"]), places=3)
+
+    def test_distance_matrix_is_symmetric_float32(self):
+        matrix = self.index.distance_matrix()
+        n = len(self.capitals)
+        self.assertEqual(matrix.typecode, "f")
+        self.assertEqual(len(matrix), n * n)
+        self.assertEqual(matrix[0], 0.0)
+        self.assertEqual(matrix[1 * n + 2], matrix[2 * n + 1])
+        self.assertIs(self.index.distance_matrix(), matrix)
+
+    def test_digest_follows_coordinates_not_version(self):
+        self.assertEqual(CapitalIndex(self.capitals, version=7).digest, self.index.digest)
+        moved = [dict(self.capitals[0], lat=self.capitals[0]["lat"] + 0.01)] + self.capitals[1:]
+        self.assertNotEqual(CapitalIndex(moved, version=1).digest, self.index.digest)
+
+if __name__ == '__main__':
+    unittest.main()
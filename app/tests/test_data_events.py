@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import unittest
+from app.services.data_events import DataEventBroker
+
+class DataEventBrokerTestCase(unittest.TestCase):
+    def test_record_publishes_only_changes(self):
+        broker = DataEventBroker()
+        self.assertEqual(broker.record("countries", {"KE": {"name": "Kenya"}, "NG": {"name": "Nigeria"}}), ["KE", "NG"])
+        self.assertEqual(broker.version, 1)
+
+        # Unchanged data does not bump the version
+        self.assertEqual(broker.record("countries", {"KE": {"name": "Kenya"}, "NG": {"name": "Nigeria"}}), [])
+        self.assertEqual(broker.version, 1)
+
+        broker.record("countries", {"KE": {"name": "Kenya", "capital": "Nairobi"}})
+        self.assertEqual(broker.version, 2)
+        self.assertEqual(broker.snapshot()["datasets"], {"countries": 2})
+
+    def test_first_fetch_of_partial_dataset_publishes_nothing(self):
+        broker = DataEventBroker()
+        # One cold profile view fetches its indicators one by one
+        for indicator in ("NY.GDP.MKTP.CD", "SP.POP.TOTL", "NV.AGR.TOTL.ZS"):
+            self.assertEqual(broker.record("indicators", {f"KE:{indicator}": 1.0}, complete=False), [])
+        self.assertEqual(broker.version, 0)
+
+        self.assertEqual(broker.record("indicators", {"KE:SP.POP.TOTL": 2.0}, complete=False), ["KE:SP.POP.TOTL"])
+        self.assertEqual(broker.version, 1)
+
+    def test_subscribers_receive_changed_keys(self):
+        broker = DataEventBroker()
+
+        async def scenario():
+            broker.record("indicators", {"KE:SP.POP.TOTL": 55000000}, complete=False)
+            listener = broker.listen(heartbeat=1)
+            pending = asyncio.ensure_future(listener.__anext__())
+            await asyncio.sleep(0)
+            broker.record("indicators", {"KE:SP.POP.TOTL": 56000000}, complete=False)
+            event = await pending
+            await listener.aclose()
+            return event
+
+        event = asyncio.run(scenario())
+        self.assertEqual(event["dataset"], "indicators")
+        self.assertEqual(event["changed"], ["KE:SP.POP.TOTL"])
+        self.assertEqual(broker.subscriber_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
+from app.services.artifacts import derived_artifacts
+from app.services.countries import CountryRecord
+from app.services.data_events import DataEventBroker
+from app.services.economic_data import EconomicDataService
+from app.services.economic_index import EconomicIndex, InvalidCursor
+from app.services.indicator_table import MISSING, IndicatorTable
+
+ROWS = [
+    {"name": "Kenya", "code": "KE", "region": "Eastern Africa", "gdp": 1.1e11, "population": 5.5e7, "gdp_growth": 5.6},
+    {"name": "Egypt", "code": "EG", "region": "Northern Africa", "gdp": 3.9e11, "population": 1.1e8, "gdp_growth": None},
+    {"name": "Rwanda", "code": "RW", "region": "Eastern Africa", "gdp": None, "population": 1.4e7, "gdp_growth": 8.2},
+    {"name": "Nigeria", "code": "NG", "region": "Western Africa", "gdp": 3.6e11, "population": 2.2e8, "gdp_growth": 3.3},
+]
+
+def codes(index, positions):
+    return [index.rows[i]["code"] for i in positions]
+
+class EconomicIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = EconomicIndex(ROWS, version="v1")
+
+    def test_sort_puts_missing_values_last(self):
+        positions, total, _ = self.index.page(sort="gdp")
+        self.assertEqual(codes(self.index, positions), ["EG", "NG", "KE", "RW"])
+        positions, _, _ = self.index.page(sort="gdp", order="asc")
+        self.assertEqual(codes(self.index, positions), ["KE", "NG", "EG", "RW"])
+        self.assertEqual(total, 4)
+
+    def test_region_partition(self):
+        region = self.index.find_region("eastern africa")
+        positions, total, _ = self.index.page(region=region, sort="gdp_growth")
+        self.assertEqual(codes(self.index, positions), ["RW", "KE"])
+        self.assertEqual(total, 2)
+        self.assertIsNone(self.index.find_region("Atlantis"))
+
+    def test_cursor_pages_through_all_rows(self):
+        seen, cursor = [], None
+        while True:
+            positions, _, cursor = self.index.page(sort="population", limit=3, cursor=cursor)
+            seen += codes(self.index, positions)
+            if cursor is None:
+                break
+        self.assertEqual(seen, ["NG", "EG", "KE", "RW"])
+
+    def test_cursor_from_other_version_is_rejected(self):
+        _, _, cursor = self.index.page(limit=1)
+        with self.assertRaises(InvalidCursor):
+            EconomicIndex(ROWS, version="v2").page(cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            self.index.page(cursor="not-a-cursor")
+
+    def test_cursor_from_other_query_is_rejected(self):
+        _, _, cursor = self.index.page(sort="population", limit=1)
+        with self.assertRaises(InvalidCursor):
+            self.index.page(sort="gdp", cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            self.index.page(region="Eastern Africa", sort="population", cursor=cursor)
+        forged = self.index.encode_cursor(-2, EconomicIndex.query_key(None, "upstream"))
+        with self.assertRaises(InvalidCursor):
+            self.index.page(cursor=forged)
+
+    def test_render_matches_rows(self):
+        positions, total, cursor = self.index.page(region="Eastern Africa", limit=1)
+        body = json.loads(self.index.render(positions, total, cursor))
+        self.assertEqual(body["economic_data"], [ROWS[0]])
+        self.assertEqual(body["total"], 2)
+        self.assertIsNotNone(body["next_cursor"])
+
+class EconomicDataPageTestCase(unittest.TestCase):
+    def test_index_is_built_once_per_data_version(self):
+        countries = [
+            CountryRecord("KE", "KEN", "Kenya", ("Nairobi",), "Eastern Africa", ("KES",), None, ()),
+            CountryRecord("EG", "EGY", "Egypt", ("Cairo",), "Northern Africa", ("EGP",), None, ()),
+        ]
+        country_service = MagicMock()
+        country_service.fetch_countries = AsyncMock(return_value=countries)
+        country_service.countries_digest = "countries-1"
+        service = EconomicDataService(country_service, MagicMock())
+        table = IndicatorTable(["KE", "EG"], list(service.indicators.values()) + list(service.sector_indicators.values()))
+        table.set("KE", "NY.GDP.MKTP.CD", 1.1e11)
+        table.set("EG", "NY.GDP.MKTP.CD", 3.9e11)
+        service.fetch_indicator_table = AsyncMock(return_value=table)
+        EconomicDataService._indicator_table = None
+        derived_artifacts.clear()
+
+        async def scenario():
+            first = await service.get_all_economic_data(fields=["code", "gdp"], sort="gdp")
+            second = await service.get_all_economic_data(region="Northern Africa")
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first["economic_data"], [{"code": "EG", "gdp": 3.9e11}, {"code": "KE", "gdp": 1.1e11}])
+        self.assertEqual(json.loads(second)["economic_data"][0]["name"], "Egypt")
+        service.fetch_indicator_table.assert_awaited_once()
+        with self.assertRaises(ValueError):
+            asyncio.run(service.get_all_economic_data(region="Atlantis"))
+
+class FetchIndicatorTableTestCase(unittest.TestCase):
+    def test_world_bank_error_body_leaves_indicator_uncovered(self):
+        gdp = "NY.GDP.MKTP.CD"
+
+        async def handle(request):
+            codes, indicator = request.url.path.split("/")[3], request.url.path.split("/")[5]
+            if indicator == gdp:
+                # What the World Bank answers, with status 200, for a failed query
+                return httpx.Response(200, json=[{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}])
+            rows = [{"country": {"id": code}, "value": 1.0} for code in codes.split(";")]
+            return httpx.Response(200, json=[{"page": 1}, rows])
+
+        original_client = httpx.AsyncClient
+        transport = httpx.MockTransport(handle)
+        service = EconomicDataService(MagicMock(), MagicMock())
+        with patch("httpx.AsyncClient", lambda *args, **kwargs: original_client(*args, transport=transport, **kwargs)), \
+                patch.object(EconomicDataService, "_world_bank_codes", {"KE", "EG"}):
+            table = asyncio.run(service.fetch_indicator_table(["KE", "EG"]))
+
+        # Left out, so lookups fall back to per-country requests and the table counts as incomplete
+        self.assertNotIn(gdp, table.indicators)
+        self.assertIs(table.lookup("KE", gdp), MISSING)
+        self.assertEqual(table.lookup("KE", "SP.POP.TOTL"), 1.0)
+
+    def test_changed_bulk_value_is_published(self):
+        population = {"KE": 5.5e7}
+
+        async def handle(request):
+            codes, indicator = request.url.path.split("/")[3], request.url.path.split("/")[5]
+            rows = [
+                {"country": {"id": code}, "value": population[code] if indicator == "SP.POP.TOTL" else 1.0}
+                for code in codes.split(";")
+            ]
+            return httpx.Response(200, json=[{"page": 1}, rows])
+
+        original_client = httpx.AsyncClient
+        transport = httpx.MockTransport(handle)
+        broker = DataEventBroker()
+        service = EconomicDataService(MagicMock(), MagicMock())
+        with patch("httpx.AsyncClient", lambda *args, **kwargs: original_client(*args, transport=transport, **kwargs)), \
+                patch("app.services.economic_data.data_events", broker), \
+                patch.object(EconomicDataService, "_world_bank_codes", {"KE"}), \
+                patch.object(EconomicDataService, "_indicator_table", None):
+            asyncio.run(service.get_indicator_table(["KE"], use_shared=False))
+            population["KE"] = 5.6e7
+            with patch.object(broker, "_publish") as publish:
+                asyncio.run(service.get_indicator_table(["KE"], force_refresh=True))
+
+        # One event, for the one value that changed
+        publish.assert_called_once_with("indicators", ["KE:SP.POP.TOTL"], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import importlib.util
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.countries import CountryRecord
+from app.services.economic_data import EconomicDataService
+from app.services.export import ExportService
+from app.services.indicator_table import IndicatorTable
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+def make_service():
+    countries = [
+        CountryRecord("KE", "KEN", "Kenya", ("Nairobi",), "Eastern Africa", ("KES",), (-1.28, 36.82), ("TZ",)),
+        CountryRecord("EG", "EGY", "Egypt", ("Cairo",), "Northern Africa", ("EGP",), None, ()),
+    ]
+    country_service = MagicMock()
+    country_service.fetch_countries = AsyncMock(return_value=countries)
+    economic_service = EconomicDataService(country_service, MagicMock())
+    # The table's rows are in a different order from the countries, and one indicator failed
+    table = IndicatorTable(["EG", "KE"], ["NY.GDP.MKTP.CD", "SP.POP.TOTL"])
+    table.set("EG", "NY.GDP.MKTP.CD", 3.9e11)
+    table.set("KE", "SP.POP.TOTL", 5.5e7)
+    economic_service.fetch_indicator_table = AsyncMock(return_value=table)
+    EconomicDataService._indicator_table = None
+    return ExportService(country_service, economic_service)
+
+class ExportTestCase(unittest.TestCase):
+    def test_build_columns(self):
+        columns = asyncio.run(make_service().build_columns())
+        self.assertEqual(columns["code"], ["KE", "EG"])
+        self.assertEqual(columns["capital_lat"], [-1.28, None])
+        self.assertEqual(columns["gdp"], [None, 3.9e11])
+        self.assertEqual(columns["population"], [5.5e7, None])
+        self.assertEqual(columns["agriculture_pct_gdp"], [None, None])
+        self.assertEqual({len(values) for values in columns.values()}, {2})
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_arrow_and_parquet_round_trip(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        service = make_service()
+        table = pa.ipc.open_stream(asyncio.run(service.export("arrow"))).read_all()
+        self.assertEqual(table.column("code").to_pylist(), ["KE", "EG"])
+        self.assertEqual(table.schema.field("gdp").type, pa.float64())
+        self.assertEqual(table.schema.field("gdp").metadata[b"world_bank_indicator"], b"NY.GDP.MKTP.CD")
+
+        parquet = pq.read_table(pa.BufferReader(asyncio.run(service.export("parquet"))))
+        self.assertEqual(parquet.column("population").to_pylist(), [5.5e7, None])
+
+if __name__ == '__main__':
+    unittest.main()
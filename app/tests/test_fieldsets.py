@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import unittest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.artifacts import derived_artifacts
+from app.services.countries import CountryRecord, CountryService
+from app.services.economic_data import (
+    EconomicDataService, PROFILE_FIELD_SOURCES, parse_fields, plan_sources, project_fields
+)
+from app.services.prefetch import profile_prefetcher
+
+KENYA = CountryRecord(
+    code="KE", code3="KEN", name="Kenya", capitals=("Nairobi",), subregion="Eastern Africa",
+    currencies=("KES",), capital_latlng=(-1.28, 36.82), borders=()
+)
+
+class FieldsetTestCase(unittest.TestCase):
+    def test_parse_expands_sections(self):
+        fields = parse_fields("economy.gdp, demographics", PROFILE_FIELD_SOURCES)
+        self.assertEqual(fields, [
+            "economy.gdp", "demographics.population", "demographics.growth_rate", "demographics.median_age"
+        ])
+        self.assertIsNone(parse_fields("", PROFILE_FIELD_SOURCES))
+        with self.assertRaises(ValueError):
+            parse_fields("economy.gdpx", PROFILE_FIELD_SOURCES)
+
+    def test_plan_skips_unneeded_upstreams(self):
+        self.assertEqual(plan_sources(["economy.gdp"], PROFILE_FIELD_SOURCES), {"gdp"})
+        self.assertEqual(plan_sources(["economy.key_sectors", "country.code"], PROFILE_FIELD_SOURCES), {"gdp", "sectors"})
+        self.assertIn("country", plan_sources(["economy.currency"], PROFILE_FIELD_SOURCES))
+
+    def test_project(self):
+        data = {"country": {"name": "Kenya", "code": "KE"}, "economy": {"gdp": 1.0, "gdp_growth": 2.0}}
+        self.assertEqual(
+            project_fields(data, ["economy.gdp", "country.code"]),
+            {"economy": {"gdp": 1.0}, "country": {"code": "KE"}}
+        )
+
+class CountryCodeTestCase(unittest.TestCase):
+    def setUp(self):
+        async def fetch_countries(service, force_refresh=False):
+            return [KENYA]
+
+        self.fetch_indicator = AsyncMock(return_value=1.0)
+        patches = [
+            patch.object(CountryService, "fetch_countries", fetch_countries),
+            patch.object(CountryService, "_countries_digest", "fieldsets-test"),
+            patch.object(EconomicDataService, "fetch_world_bank_data", self.fetch_indicator),
+            patch.object(profile_prefetcher, "record"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        derived_artifacts.clear()
+        self.addCleanup(derived_artifacts.clear)
+        self.client = TestClient(app)
+
+    def test_unknown_country_is_404_without_country_fields(self):
+        for path in ("/api/v1/economic-data", "/api/v1/country-profile"):
+            self.fetch_indicator.reset_mock()
+            self.assertEqual(self.client.get(f"{path}/ZZ?fields=economy.gdp").status_code, 404)
+            self.fetch_indicator.assert_not_called()
+
+            response = self.client.get(f"{path}/KE?fields=economy.gdp")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"economy": {"gdp": 1.0}})
+
+    def test_lower_case_and_alpha3_codes_use_the_alpha2_caches(self):
+        for path in ("/api/v1/economic-data", "/api/v1/country-profile"):
+            for code in ("ke", "KEN"):
+                self.fetch_indicator.reset_mock()
+                response = self.client.get(f"{path}/{code}?fields=country.code,economy.gdp")
+                self.assertEqual(response.json(), {"country": {"code": "KE"}, "economy": {"gdp": 1.0}})
+                self.fetch_indicator.assert_called_once_with("KE", "NY.GDP.MKTP.CD")
+
+if __name__ == '__main__':
+    unittest.main()
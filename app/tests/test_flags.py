@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import patch
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.flags import FLAG_HEIGHT, FLAG_WIDTH, SPRITE_COLUMNS, FlagSpriteService, build_sprite
+
+def png(code):
+    return b"\x89PNG\r\n\x1a\n" + code.encode("ascii")
+
+class FakeCountry:
+    def __init__(self, code):
+        self.code = code
+
+class FakeCountryService:
+    countries_digest = "countries-1"
+
+    def __init__(self, codes):
+        self.countries = [FakeCountry(code) for code in codes]
+
+    async def fetch_countries(self):
+        return self.countries
+
+class BuildSpriteTestCase(unittest.TestCase):
+    def test_flags_are_laid_out_on_a_grid(self):
+        codes = [f"A{chr(65 + i)}" for i in range(SPRITE_COLUMNS + 2)]
+        sprite = build_sprite({code: png(code) for code in codes})
+
+        self.assertEqual(sprite.offsets["AA"], [0, 0])
+        self.assertEqual(sprite.offsets["AB"], [FLAG_WIDTH, 0])
+        self.assertEqual(sprite.offsets[codes[SPRITE_COLUMNS]], [0, FLAG_HEIGHT])
+        manifest = sprite.manifest
+        self.assertEqual((manifest["width"], manifest["height"]), (SPRITE_COLUMNS * FLAG_WIDTH, 2 * FLAG_HEIGHT))
+        self.assertEqual(sprite.svg.count(b"<image "), len(codes))
+        self.assertTrue(sprite.svg.startswith(b"<svg "))
+
+    def test_missing_flags_are_left_out(self):
+        sprite = build_sprite({"KE": png("KE"), "NG": None})
+        self.assertEqual(list(sprite.offsets), ["KE"])
+        self.assertEqual(sprite.missing, ["NG"])
+
+    def test_version_changes_with_content(self):
+        self.assertNotEqual(build_sprite({"KE": png("KE")}).version, build_sprite({"KE": png("NG")}).version)
+
+class FlagSpriteServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.calls = Counter()
+        self.failing = set()
+
+        async def handle(request):
+            code = request.url.path.rsplit("/", 1)[-1].split(".")[0]
+            self.calls[code] += 1
+            if code in self.failing:
+                return httpx.Response(404)
+            return httpx.Response(200, content=png(code))
+
+        transport = httpx.MockTransport(handle)
+        original_client = httpx.AsyncClient
+        cache_dir = tempfile.mkdtemp()
+        original_init = FlagSpriteService.__init__
+
+        def service_init(service, country_service):
+            original_init(service, country_service)
+            service.cache_dir = cache_dir
+
+        patches = [
+            patch("httpx.AsyncClient", lambda *args, **kwargs: original_client(*args, transport=transport, **kwargs)),
+            patch.object(FlagSpriteService, "__init__", service_init),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.reset()
+        self.addCleanup(self.reset)
+
+    @staticmethod
+    def reset():
+        FlagSpriteService._sprite = None
+        FlagSpriteService._sprite_key = None
+        FlagSpriteService._sprite_retry_at = 0
+
+    def sprite(self, codes):
+        return asyncio.run(FlagSpriteService(FakeCountryService(codes)).get_sprite())
+
+    def test_flags_are_downloaded_once(self):
+        sprite = self.sprite(["KE", "NG"])
+        self.assertEqual(sorted(sprite.offsets), ["KE", "NG"])
+        self.assertEqual(dict(self.calls), {"ke": 1, "ng": 1})
+
+        # Cached in memory while the countries are unchanged, then read back from disk
+        self.assertIs(self.sprite(["KE", "NG"]), sprite)
+        self.reset()
+        self.assertEqual(self.sprite(["KE", "NG"]).version, sprite.version)
+        self.assertEqual(dict(self.calls), {"ke": 1, "ng": 1})
+
+    def test_incomplete_sprite_is_retried(self):
+        self.failing = {"ng"}
+        sprite = self.sprite(["KE", "NG"])
+        self.assertEqual(sprite.missing, ["NG"])
+        self.assertIs(self.sprite(["KE", "NG"]), sprite)
+
+        self.failing = set()
+        FlagSpriteService._sprite_retry_at = 0
+        self.assertEqual(sorted(self.sprite(["KE", "NG"]).offsets), ["KE", "NG"])
+
+class FlagRoutesTestCase(unittest.TestCase):
+    def setUp(self):
+        sprite = build_sprite({"KE": png("KE")})
+
+        async def get_sprite(service):
+            return sprite
+
+        patcher = patch.object(FlagSpriteService, "get_sprite", get_sprite)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def test_manifest_revalidates(self):
+        manifest = self.client.get("/api/v1/flags/manifest.json")
+        self.assertEqual(manifest.status_code, 200)
+        self.assertEqual(manifest.json()["flags"], {"KE": [0, 0]})
+        etag = manifest.headers["etag"]
+        self.assertEqual(self.client.get("/api/v1/flags/manifest.json", headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_versioned_sprite_is_immutable(self):
+        version = self.client.get("/api/v1/flags/manifest.json").json()["version"]
+        sprite = self.client.get(f"/api/v1/flags/sprite.svg?v={version}")
+        self.assertEqual(sprite.status_code, 200)
+        self.assertEqual(sprite.headers["content-type"], "image/svg+xml")
+        self.assertIn("immutable", sprite.headers["cache-control"])
+        self.assertEqual(self.client.get("/api/v1/flags/sprite.svg").headers["cache-control"], "no-cache")
+
+if __name__ == '__main__':
+    unittest.main()
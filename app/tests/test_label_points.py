@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import unittest
+from app.services.geo_data import GeoDataService
+from app.services.label_points import label_point, pole_of_inaccessibility
+from app.services.spatial_index import SpatialIndex
+
+# A "C" open to the east: its bounding box centre (5, 5) is outside the polygon
+C_SHAPE = [[0, 0], [10, 0], [10, 2], [2, 2], [2, 8], [10, 8], [10, 10], [0, 10], [0, 0]]
+
+def square(lon, lat, size):
+    return [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+
+class LabelPointTestCase(unittest.TestCase):
+    def test_pole_of_square_is_its_centre(self):
+        x, y = pole_of_inaccessibility([square(0, 0, 4)], 0.001)
+        self.assertAlmostEqual(x, 2, places=2)
+        self.assertAlmostEqual(y, 2, places=2)
+
+    def test_label_of_concave_polygon_is_inside_it(self):
+        geometry = {"type": "Polygon", "coordinates": [C_SHAPE]}
+        lon, lat = label_point(geometry)
+        index = SpatialIndex([{"properties": {"ISO_A2": "CC"}, "geometry": geometry}], cell_size=1.0)
+        self.assertEqual(index.locate(lat, lon)["code"], "CC")
+        # In the spine of the C, not in the gap between its arms
+        self.assertLess(lon, 2)
+
+    def test_hole_is_avoided(self):
+        x, y = pole_of_inaccessibility([square(0, 0, 10), square(3, 3, 4)], 0.001)
+        self.assertFalse(3 <= x <= 7 and 3 <= y <= 7)
+
+    def test_multipolygon_labels_largest_part(self):
+        geometry = {"type": "MultiPolygon", "coordinates": [[square(0, 0, 1)], [square(20, 0, 6)]]}
+        lon, lat = label_point(geometry)
+        self.assertAlmostEqual(lon, 23, delta=0.1)
+        self.assertAlmostEqual(lat, 3, delta=0.1)
+
+    def test_other_geometries_have_no_label(self):
+        self.assertIsNone(label_point({"type": "Point", "coordinates": [1, 2]}))
+        self.assertIsNone(label_point(None))
+
+    def test_african_geojson_carries_labels_without_changing_upstream(self):
+        feature = {
+            "type": "Feature",
+            "properties": {"CONTINENT": "Africa", "ISO_A2": "CC"},
+            "geometry": {"type": "Polygon", "coordinates": [square(0, 0, 4)]}
+        }
+        other = {"type": "Feature", "properties": {"CONTINENT": "Asia"}, "geometry": None}
+        african = GeoDataService._african_geojson({"features": [feature, other]})
+
+        self.assertEqual(len(african["features"]), 1)
+        lon, lat = african["features"][0]["properties"]["LABEL_POINT"]
+        self.assertAlmostEqual(lon, 2, delta=0.05)
+        self.assertAlmostEqual(lat, 2, delta=0.05)
+        self.assertNotIn("LABEL_POINT", feature["properties"])
+
+if __name__ == '__main__':
+    unittest.main()
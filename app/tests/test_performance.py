@@ -0,0 +1,241 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+import unittest
+from collections import Counter
+from urllib.parse import urlparse
+from unittest.mock import patch
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.artifacts import derived_artifacts
+from app.services.countries import CountryService
+from app.services.economic_data import EconomicDataService
+from app.services.geo_data import GeoDataService
+from app.services.prefetch import profile_prefetcher
+from app.services.upstream import upstream
+
+# Seconds every fake upstream request takes; latency budgets are expressed against it
+UPSTREAM_DELAY = 0.05
+
+# Per endpoint: upstream calls with cold and warm caches, the most upstream requests in
+# flight at once during the cold request, peak traced allocation during it, and in-process
+# latency bounds. Cold latency is expressed in upstream round trips. Exceeding any of them
+# fails the build.
+BUDGETS = {
+    "/api/v1/african-capitals": {
+        "cold_calls": {"restcountries": 1}, "cold_concurrency": 1, "peak_kb": 512,
+        "cold_seconds": 3 * UPSTREAM_DELAY, "warm_seconds": 0.05,
+    },
+    "/api/v1/economic-data": {
+        # One bulk request per indicator, never one per country, after the World Bank's
+        # country list (loaded alongside the countries)
+        "cold_calls": {"restcountries": 1, "worldbank-countries": 1, "worldbank-bulk": 7}, "cold_concurrency": 7, "peak_kb": 1024,
+        "cold_seconds": 4 * UPSTREAM_DELAY, "warm_seconds": 0.05,
+    },
+    "/api/v1/country-profile/KE": {
+        # Three round trips: the countries, then the indicators (three at a time) alongside
+        # the sector shares. Serial calls would take eight.
+        "cold_calls": {"restcountries": 1, "worldbank": 7}, "cold_concurrency": 6, "peak_kb": 512,
+        "cold_seconds": 4 * UPSTREAM_DELAY, "warm_seconds": 0.05,
+    },
+    "/api/v1/map-data": {
+        # One download, then the label search over every African polygon and serialization:
+        # about 50ms on the fake geometry, with headroom for slower machines
+        "cold_calls": {"naturalearth": 1}, "cold_concurrency": 1, "peak_kb": 512,
+        "cold_seconds": UPSTREAM_DELAY + 0.12, "warm_seconds": 0.05,
+    },
+}
+
+REGIONS = ["Northern Africa", "Western Africa", "Eastern Africa", "Southern Africa", "Middle Africa"]
+CODES = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(54)]
+CODES[0] = "KE"
+# Réunion is in REST Countries' Africa but not in the World Bank's country list
+CODES[1] = "RE"
+WORLD_BANK_CODES = [code for code in CODES if code != "RE"]
+
+def fake_countries():
+    return [
+        {
+            "name": {"common": f"Country {code}"},
+            "cca2": code,
+            "cca3": f"{code}X",
+            "capital": [f"Capital {code}"],
+            "capitalInfo": {"latlng": [-30 + i, -10 + i % 40]},
+            "subregion": REGIONS[i % len(REGIONS)],
+            "currencies": {f"{code}D": {"name": "Dollar"}},
+            "borders": [f"{CODES[(i + 1) % len(CODES)]}X"],
+        }
+        for i, code in enumerate(CODES)
+    ]
+
+def fake_geojson():
+    features = []
+    for i, code in enumerate(CODES):
+        lon, lat = -20 + (i % 9) * 6, -35 + (i // 9) * 10
+        ring = [[lon, lat], [lon + 5, lat], [lon + 5, lat + 9], [lon, lat + 9], [lon, lat]]
+        features.append({
+            "type": "Feature",
+            "properties": {"CONTINENT": "Africa", "ISO_A2": code, "ISO_A3": f"{code}X", "ADM0_A3": f"{code}X", "NAME": code},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+class FakeUpstream:
+    """In-process REST Countries, World Bank and Natural Earth that count requests"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.countries = json.dumps(fake_countries()).encode("utf-8")
+        self.geojson = json.dumps(fake_geojson()).encode("utf-8")
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(UPSTREAM_DELAY)
+        finally:
+            self.in_flight -= 1
+        url = urlparse(str(request.url))
+        if url.netloc == "restcountries.com":
+            self.calls["restcountries"] += 1
+            return httpx.Response(200, content=self.countries, headers={"ETag": '"countries-1"'})
+        if url.netloc == "raw.githubusercontent.com":
+            self.calls["naturalearth"] += 1
+            return httpx.Response(200, content=self.geojson)
+        if url.netloc == "api.worldbank.org" and url.path == "/v2/country":
+            self.calls["worldbank-countries"] += 1
+            return httpx.Response(200, json=[{"page": 1}, [{"iso2Code": code} for code in WORLD_BANK_CODES]])
+        if url.netloc == "api.worldbank.org":
+            # /v2/country/<codes>/indicator/<indicator>
+            parts = url.path.split("/")
+            codes, indicator = parts[3].split(";"), parts[5]
+            self.calls["worldbank-bulk" if len(codes) > 1 else "worldbank"] += 1
+            if any(code not in WORLD_BANK_CODES for code in codes):
+                # As the World Bank does: the whole query fails, with status 200
+                return httpx.Response(200, json=[{"message": [{"id": "120", "key": "Invalid value"}]}])
+            rows = [
+                {"country": {"id": code}, "indicator": {"id": indicator}, "value": float(100 + i)}
+                for i, code in enumerate(codes)
+            ]
+            return httpx.Response(200, json=[{"page": 1}, rows])
+        return httpx.Response(404)
+
+class PerformanceBudgetTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+        # The first request through a client pays one-off startup costs; keep them out of
+        # the latency budgets
+        cls.client.get("/api/v1/data-version")
+
+    def setUp(self):
+        self.upstream = FakeUpstream()
+        transport = httpx.MockTransport(self.upstream.handle)
+        original_client = httpx.AsyncClient
+        cache_dir = tempfile.mkdtemp()
+        original_geo_init = GeoDataService.__init__
+
+        def fake_client(*args, **kwargs):
+            return original_client(*args, transport=transport, **kwargs)
+
+        def geo_init(service):
+            original_geo_init(service)
+            # Start from an empty GeoJSON cache rather than the checked-in file
+            service.cache_file = os.path.join(cache_dir, "countries.geojson")
+            service.cache_meta_file = service.cache_file + ".meta.json"
+
+        patches = [
+            patch("httpx.AsyncClient", fake_client),
+            patch.object(GeoDataService, "__init__", geo_init),
+            # Prefetching would add background upstream calls to the counts
+            patch.object(profile_prefetcher, "top_n", 0),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.reset_caches()
+        self.addCleanup(self.reset_caches)
+
+    @staticmethod
+    def reset_caches():
+        CountryService._countries_cache = None
+        CountryService._countries_cache_time = 0
+        CountryService._countries_digest = None
+        GeoDataService._geojson = None
+        GeoDataService._geojson_digest = None
+        GeoDataService._geojson_shared_version = None
+        EconomicDataService._wb_cache = {}
+        EconomicDataService._indicator_table = None
+        EconomicDataService._indicator_table_expires = 0
+        EconomicDataService._world_bank_codes = None
+        EconomicDataService._world_bank_codes_retry_at = 0
+        derived_artifacts.clear()
+        upstream.clear()
+
+    def timed_get(self, path):
+        started = time.perf_counter()
+        response = self.client.get(path)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, 200, response.text)
+        return elapsed
+
+    def check_budget(self, path):
+        budget = BUDGETS[path]
+
+        cold = self.timed_get(path)
+        self.assertEqual(dict(self.upstream.calls), budget["cold_calls"], "cold upstream calls")
+        self.assertEqual(self.upstream.peak_in_flight, budget["cold_concurrency"], "cold upstream concurrency")
+        self.assertLess(cold, budget["cold_seconds"], "cold latency")
+
+        self.upstream.calls.clear()
+        warm = min(self.timed_get(path) for _ in range(3))
+        self.assertEqual(dict(self.upstream.calls), {}, "warm upstream calls")
+        self.assertLess(warm, budget["warm_seconds"], "warm latency")
+
+        # Allocation is measured on a separate cold request, since tracing slows it down
+        self.reset_caches()
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            self.timed_get(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak / 1024, budget["peak_kb"], "peak allocation (KiB)")
+
+    def test_african_capitals(self):
+        self.check_budget("/api/v1/african-capitals")
+
+    def test_economic_data(self):
+        self.check_budget("/api/v1/economic-data")
+
+    def test_country_profile(self):
+        self.check_budget("/api/v1/country-profile/KE")
+
+    def test_map_data(self):
+        self.check_budget("/api/v1/map-data")
+
+    def test_territories_are_left_out_of_bulk_queries(self):
+        rows = self.client.get("/api/v1/economic-data").json()["economic_data"]
+        self.assertNotIn("worldbank", self.upstream.calls)
+        by_code = {row["code"]: row for row in rows}
+        self.assertIsNone(by_code["RE"]["gdp"])
+        self.assertIsNotNone(by_code["KE"]["gdp"])
+
+    def test_profile_after_economic_data_needs_no_world_bank_calls(self):
+        self.timed_get("/api/v1/economic-data")
+        self.upstream.calls.clear()
+        self.timed_get("/api/v1/country-profile/KE")
+        self.assertEqual(dict(self.upstream.calls), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.services.countries import CountryRecord, CountryService
+from app.services.economic_data import EconomicDataService
+from app.services.prefetch import DecayingCounter, ProfilePrefetcher, profile_prefetcher
+
+COUNTRIES = {
+    "KE": CountryRecord("KE", "KEN", "Kenya", ("Nairobi",), "Eastern Africa", ("KES",), None, ("TZA", "UGA")),
+    "TZA": CountryRecord("TZ", "TZA", "Tanzania", ("Dodoma",), "Eastern Africa", ("TZS",), None, ("KEN",)),
+    "UGA": CountryRecord("UG", "UGA", "Uganda", ("Kampala",), "Eastern Africa", ("UGX",), None, ("KEN",)),
+}
+
+class DecayingCounterTestCase(unittest.TestCase):
+    def test_recent_traffic_outranks_old_traffic(self):
+        counter = DecayingCounter(half_life=60)
+        for _ in range(4):
+            counter.hit("NG", now=0)
+        counter.hit("KE", now=170)
+        counter.hit("KE", now=180)
+        # NG decayed to 4 / 2**3 = 0.5 by t=180
+        self.assertEqual(counter.top(2, now=180), ["KE", "NG"])
+        self.assertEqual(counter.top(1, now=180), ["KE"])
+
+    def test_reading_top_does_not_change_scores(self):
+        counter = DecayingCounter(half_life=60)
+        counter.hit("NG", now=0)
+        scores = dict(counter._scores)
+        # Long enough for NG to decay below the cut-off, which top() leaves in place
+        self.assertEqual(counter.top(5, now=6000), [])
+        self.assertEqual(counter._scores, scores)
+        self.assertEqual(counter.top(5, now=0), ["NG"])
+
+class ProfilePrefetcherTestCase(unittest.TestCase):
+    def setUp(self):
+        EconomicDataService._wb_cache = {}
+        EconomicDataService._indicator_table = None
+        self.fetched = []
+
+        async def fake_fetch(service, code, indicator):
+            self.fetched.append((code, indicator))
+            service._wb_cache[f"{code}:{indicator}"] = {"value": 1.0, "timestamp": time.time()}
+            return 1.0
+
+        async def fake_country(service, code):
+            return COUNTRIES.get(code.upper())
+
+        patches = [
+            patch.object(EconomicDataService, "fetch_world_bank_data", fake_fetch),
+            patch.object(CountryService, "get_country_data", fake_country),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_warm_only_fetches_uncached_within_budget(self):
+        prefetcher = ProfilePrefetcher(top_n=4, budget_per_minute=10, half_life=60, interval=60)
+
+        async def scenario():
+            self.assertTrue(await prefetcher.warm("KE"))
+            # Everything is cached now, so nothing is spent
+            self.assertFalse(await prefetcher.warm("KE"))
+            # Seven indicators do not fit in the three remaining tokens
+            self.assertFalse(await prefetcher.warm("NG"))
+
+        asyncio.run(scenario())
+        self.assertEqual(len(self.fetched), 7)
+        self.assertEqual(prefetcher.skipped, 1)
+
+    def test_record_warms_neighbours(self):
+        prefetcher = ProfilePrefetcher(top_n=4, budget_per_minute=100, half_life=60, interval=60)
+
+        async def scenario():
+            prefetcher.record("ke")
+            await asyncio.gather(*prefetcher._tasks)
+
+        asyncio.run(scenario())
+        self.assertEqual({code for code, _ in self.fetched}, {"TZ", "UG"})
+        self.assertEqual(prefetcher.counter.top(1), ["KE"])
+
+class ProfileRecordingTestCase(unittest.TestCase):
+    def test_health_check_probes_are_not_recorded(self):
+        async def fake_profile(service, code, fields):
+            return {"country": {"code": code}, "economy": {"gdp": 1.0}}
+
+        async def get_country_data(service, code):
+            return COUNTRIES.get(code.upper())
+
+        record = MagicMock()
+        with patch.object(EconomicDataService, "get_country_profile", fake_profile), \
+                patch.object(CountryService, "get_country_data", get_country_data), \
+                patch.object(profile_prefetcher, "record", record):
+            client = TestClient(app)
+            probe = client.get(
+                "/api/v1/country-profile/KE?fields=economy.gdp",
+                headers={"X-Health-Check": settings.HEALTH_CHECK_TOKEN}
+            )
+            self.assertEqual(probe.status_code, 200)
+            record.assert_not_called()
+
+            # Counted under the code the caches use, whatever case the path was in
+            self.assertEqual(client.get("/api/v1/country-profile/ke?fields=economy.gdp").status_code, 200)
+            record.assert_called_once_with("KE")
+
+if __name__ == '__main__':
+    unittest.main()
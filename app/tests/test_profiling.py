@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.profiling import RequestProfiler, StackSampler
+from app.middleware.profiling import ProfilingMiddleware
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+class ProfilingTestCase(unittest.TestCase):
+    def test_sampler_collects_collapsed_stacks(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        busy_wait(0.1)
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        line = sampler.collapsed().splitlines()[0]
+        stack, count = line.rsplit(" ", 1)
+        self.assertIn("busy_wait (test_profiling.py:", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_profile_header_requires_admin_token(self):
+        app = FastAPI()
+
+        @app.get("/slow")
+        async def slow():
+            busy_wait(0.01)
+            return {"ok": True}
+
+        app.add_middleware(ProfilingMiddleware)
+        client = TestClient(app)
+        with patch("app.core.profiling.settings.ADMIN_TOKEN", "secret"):
+            self.assertEqual(client.get("/slow").json(), {"ok": True})
+            self.assertEqual(client.get("/slow", headers={"X-Profile": "wrong"}).status_code, 403)
+            response = client.get("/slow", headers={"X-Profile": "secret"})
+        self.assertEqual(response.headers["x-profiled-status"], "200")
+        self.assertIn("busy_wait", response.text)
+
+    def test_failed_start_does_not_hold_the_lock(self):
+        failing = RequestProfiler()
+        with patch.object(failing.profile, "enable", side_effect=ValueError("Another profiling tool is already active")):
+            self.assertFalse(failing.start())
+        profiler = RequestProfiler()
+        self.assertTrue(profiler.start())
+        profiler.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import subprocess
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.refresh import DataRefresher
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+
+class ReadinessTestCase(unittest.TestCase):
+    def test_not_ready_until_warm_up_finishes(self):
+        release = threading.Event()
+
+        async def slow_warm(refresher):
+            await asyncio.to_thread(release.wait, 5)
+
+        with patch.object(DataRefresher, "warm", slow_warm):
+            with TestClient(app) as client:
+                response = client.get("/api/v1/ready")
+                self.assertEqual(response.status_code, 503)
+                # Liveness is unaffected while warming up
+                self.assertEqual(client.get("/api/v1/health/loop").status_code, 200)
+
+                release.set()
+                deadline = time.monotonic() + 5
+                while response.status_code != 200 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                    response = client.get("/api/v1/ready")
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()["ready"])
+
+    def test_ready_after_failed_warm_up(self):
+        async def failing_warm(refresher):
+            raise RuntimeError("upstream unavailable")
+
+        with patch.object(DataRefresher, "warm", failing_warm):
+            with TestClient(app) as client:
+                deadline = time.monotonic() + 5
+                response = client.get("/api/v1/ready")
+                while response.status_code != 200 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                    response = client.get("/api/v1/ready")
+                self.assertEqual(response.status_code, 200)
+
+    def test_import_has_no_startup_side_effects(self):
+        # A fresh interpreter, since this one has long imported everything
+        code = (
+            "import sys, app.main, app.core.logging as log; "
+            "print('aiohttp' in sys.modules, log._listener is None)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        self.assertEqual(output, ["False", "True"])
+
+if __name__ == '__main__':
+    unittest.main()
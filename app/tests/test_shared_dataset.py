@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import unittest
+from unittest.mock import patch
+import orjson
+from app.services.artifacts import derived_artifacts
+from app.services.data_events import DataEventBroker
+from app.services.geo_data import GeoDataService
+from app.services.indicator_table import IndicatorTable
+from app.services.refresh import SharedDatasetWatcher
+from app.services.shared_dataset import SharedDataset
+
+GDP = "NY.GDP.MKTP.CD"
+
+def geometry(size):
+    ring = [[30, 0], [30 + size, 0], [30 + size, size], [30, size], [30, 0]]
+    return orjson.dumps({
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "properties": {"CONTINENT": "Africa", "ISO_A2": "KE", "ISO_A3": "KEN", "NAME": "Kenya"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}
+        }]
+    })
+
+def table(gdp):
+    indicators = IndicatorTable(["KE"], [GDP])
+    indicators.set("KE", GDP, gdp)
+    return indicators
+
+class SharedDatasetWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.shared = SharedDataset(f"test-shared-{id(self)}")
+        self.addCleanup(self.shared.unlink_all)
+        self.broker = DataEventBroker()
+        patches = [
+            patch("app.services.geo_data.shared_dataset", self.shared),
+            patch("app.services.geo_data.data_events", self.broker),
+            patch("app.services.refresh.data_events", self.broker),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.reset()
+        self.addCleanup(self.reset)
+
+    @staticmethod
+    def reset():
+        GeoDataService._geojson = None
+        GeoDataService._geojson_digest = None
+        GeoDataService._geojson_shared_version = None
+        derived_artifacts.clear()
+
+    def publish(self, gdp, size, geojson_digest):
+        self.shared.publish(
+            table(gdp), [("KE", -1.3, 36.8)], geometry(size),
+            countries_digest="countries-1", geojson_digest=geojson_digest
+        )
+
+    def test_worker_subscribers_see_published_updates(self):
+        watcher = SharedDatasetWatcher(self.shared)
+
+        async def scenario():
+            self.publish(1.0, 4, "geo-1")
+            await watcher.check()
+            index = await GeoDataService().get_spatial_index()
+            self.assertEqual(index.locate(1, 31)["code"], "KE")
+
+            listener = self.broker.listen(heartbeat=1)
+            pending = asyncio.ensure_future(listener.__anext__())
+            await asyncio.sleep(0)
+            self.publish(2.0, 6, "geo-2")
+            await watcher.check()
+            events = [await pending, await listener.__anext__()]
+            await listener.aclose()
+            return events
+
+        events = asyncio.run(scenario())
+        self.assertEqual(
+            sorted((event["dataset"], event["changed"]) for event in events),
+            [("geometry", ["KE"]), ("indicators", [f"KE:{GDP}"])]
+        )
+        # The worker's geometry is the published version, and nothing built from the previous
+        # one is kept
+        self.assertEqual(GeoDataService._geojson_digest, "geo-2")
+        self.assertIsNone(derived_artifacts.digest("spatial_index"))
+
+    def test_every_worker_reports_the_shared_version(self):
+        self.publish(1.0, 4, "geo-1")
+        self.publish(2.0, 4, "geo-1")
+        # Two workers, each with its own broker, following the same segments
+        for broker in (self.broker, DataEventBroker()):
+            with patch("app.services.refresh.data_events", broker):
+                asyncio.run(SharedDatasetWatcher(self.shared).check())
+            self.assertEqual(broker.snapshot()["version"], 2)
+
+        watcher = SharedDatasetWatcher(self.shared)
+
+        async def scenario():
+            await watcher.check()
+            listener = self.broker.listen(heartbeat=1)
+            pending = asyncio.ensure_future(listener.__anext__())
+            await asyncio.sleep(0)
+            self.publish(3.0, 4, "geo-1")
+            await watcher.check()
+            event = await pending
+            await listener.aclose()
+            return event
+
+        # Updates carry the shared version as well, not a count of this worker's events
+        self.assertEqual(asyncio.run(scenario())["version"], 3)
+
+    def test_unchanged_version_publishes_nothing(self):
+        watcher = SharedDatasetWatcher(self.shared)
+        self.publish(1.0, 4, "geo-1")
+        asyncio.run(watcher.check())
+        version = self.broker.version
+        asyncio.run(watcher.check())
+        self.assertEqual(self.broker.version, version)
+
+    def test_map_data_is_copied_once_per_version(self):
+        self.publish(1.0, 4, "geo-1")
+
+        async def snapshots():
+            service = GeoDataService()
+            return [await service.get_map_data_snapshot() for _ in range(2)]
+
+        (digest, first), (_, second) = asyncio.run(snapshots())
+        self.assertEqual(digest, "geo-1")
+        self.assertIs(first, second)
+        self.assertEqual(first, geometry(4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import unittest
+from app.services.spatial_index import SpatialIndex
+
+def square(code, min_lon, min_lat, size, hole=None):
+    rings = [[
+        [min_lon, min_lat], [min_lon + size, min_lat], [min_lon + size, min_lat + size],
+        [min_lon, min_lat + size], [min_lon, min_lat]
+    ]]
+    if hole:
+        hx, hy, hs = hole
+        rings.append([[hx, hy], [hx, hy + hs], [hx + hs, hy + hs], [hx + hs, hy], [hx, hy]])
+    return {
+        "type": "Feature",
+        "properties": {"ISO_A2": code, "ISO_A3": code + "X", "NAME": code},
+        "geometry": {"type": "Polygon", "coordinates": rings}
+    }
+
+class SpatialIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = SpatialIndex([
+            square("AA", 0, 0, 10, hole=(4, 4, 2)),
+            square("BB", 10, 0, 5),
+            {
+                "type": "Feature",
+                "properties": {"ISO_A2": "-99", "ADM0_A3": "SOL", "NAME": "Islands"},
+                "geometry": {"type": "MultiPolygon", "coordinates": [
+                    [[[20, 20], [21, 20], [21, 21], [20, 21], [20, 20]]],
+                    [[[22.2, 20.2], [22.4, 20.2], [22.4, 20.4], [22.2, 20.2]]]
+                ]}
+            }
+        ])
+
+    def test_locate(self):
+        self.assertEqual(self.index.locate(1, 1)["code"], "AA")
+        self.assertEqual(self.index.locate(2.5, 12.5)["code"], "BB")
+        self.assertEqual(self.index.locate(20.25, 22.35)["code"], "SOL")
+        # Inside the hole, and outside every country
+        self.assertIsNone(self.index.locate(5, 5))
+        self.assertIsNone(self.index.locate(-5, -5))
+
+    def test_locate_many(self):
+        points = [(1, 1), (5, 5), (2.5, 12.5), (20.5, 20.5)]
+        self.assertEqual(self.index.locate_many(points), ["AA", None, "BB", "SOL"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.tracing import TimedJSONResponse, begin_trace, end_trace, span
+from app.middleware.tracing import TracingMiddleware
+
+class TracingTestCase(unittest.TestCase):
+    def test_spans_outside_a_request_record_nothing(self):
+        with span("countries") as timing:
+            timing.set(cache="hit")
+
+    def test_server_timing_header(self):
+        app = FastAPI(default_response_class=TimedJSONResponse)
+
+        async def indicator(cache):
+            with span("wb.SP.POP.TOTL") as timing:
+                timing.set(cache=cache)
+                await asyncio.sleep(0)
+
+        @app.get("/profile")
+        async def profile():
+            with span("countries", cache="hit"):
+                pass
+            await asyncio.gather(indicator("hit"), indicator("miss"), indicator("miss"))
+            return {"ok": True}
+
+        app.add_middleware(TracingMiddleware)
+        timing = TestClient(app).get("/profile").headers["server-timing"]
+        entries = [entry.split(";")[0] for entry in timing.split(", ")]
+        self.assertEqual(entries, ["app", "countries", "wb.SP.POP.TOTL", "encode"])
+        self.assertIn('countries;dur=', timing)
+        self.assertIn('desc="hit"', timing)
+        self.assertIn('desc="n=3 hit=1 miss=2"', timing)
+
+    def test_otlp_export_links_children_to_parent(self):
+        async def traced():
+            collector, token = begin_trace()
+            try:
+                with span("request"):
+                    with span("countries", cache="miss"):
+                        pass
+            finally:
+                end_trace(token)
+            return collector
+
+        payload = asyncio.run(traced()).to_otlp()
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root, child = spans
+        self.assertEqual(child["parentSpanId"], root["spanId"])
+        self.assertNotIn("parentSpanId", root)
+        self.assertEqual(child["traceId"], root["traceId"])
+        self.assertEqual(child["attributes"], [{"key": "cache", "value": {"stringValue": "miss"}}])
+        self.assertLessEqual(int(child["startTimeUnixNano"]), int(child["endTimeUnixNano"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+import httpx
+from app.services.countries import CountryService
+from app.services.upstream import ConditionalFetcher, upstream
+
+COUNTRIES = [{
+    "name": {"common": "Kenya"}, "cca2": "KE", "cca3": "KEN", "capital": ["Nairobi"],
+    "capitalInfo": {"latlng": [-1.28, 36.82]}, "subregion": "Eastern Africa",
+    "currencies": {"KES": {"name": "Kenyan shilling"}}, "borders": []
+}]
+
+class ConditionalFetcherTestCase(unittest.TestCase):
+    def setUp(self):
+        # (etag, body) answered in turn; the If-None-Match of each request is recorded
+        self.responses = []
+        self.sent = []
+
+        async def handle(request):
+            self.sent.append(request.headers.get("if-none-match"))
+            etag, body = self.responses.pop(0)
+            return httpx.Response(200, content=body, headers={"ETag": etag})
+
+        self.transport = httpx.MockTransport(handle)
+
+    def fetch(self, fetcher):
+        async def run():
+            async with httpx.AsyncClient(transport=self.transport) as client:
+                return await fetcher.fetch(client, "https://example.test/data")
+        return asyncio.run(run())
+
+    def test_validators_are_kept_only_once_committed(self):
+        fetcher = ConditionalFetcher()
+        self.responses = [('"v1"', b"first"), ('"v1"', b"first"), ('"v1"', b"first")]
+        self.fetch(fetcher)
+        self.assertIsNone(fetcher.validators("https://example.test/data"))
+
+        fetcher.commit(self.fetch(fetcher))
+        self.assertFalse(self.fetch(fetcher).changed)
+        self.assertEqual(self.sent, [None, None, '"v1"'])
+
+    def test_countries_payload_that_fails_to_parse_is_fetched_again(self):
+        original_client = httpx.AsyncClient
+        patcher = patch("httpx.AsyncClient", lambda *args, **kwargs: original_client(*args, transport=self.transport, **kwargs))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reset()
+        self.addCleanup(self.reset)
+
+        body = json.dumps(COUNTRIES).encode("utf-8")
+        self.responses = [('"v1"', body), ('"v2"', b"{truncated"), ('"v2"', body)]
+        asyncio.run(CountryService().fetch_countries())
+        with self.assertRaises(Exception):
+            asyncio.run(CountryService().fetch_countries(force_refresh=True))
+        asyncio.run(CountryService().fetch_countries(force_refresh=True))
+        # Revalidated against the last payload that parsed, not the broken one
+        self.assertEqual(self.sent, [None, '"v1"', '"v1"'])
+
+    @staticmethod
+    def reset():
+        CountryService._countries_cache = None
+        CountryService._countries_cache_time = 0
+        CountryService._countries_digest = None
+        upstream.clear()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import asyncio
+import time
+import unittest
+from app.core.watchdog import LoopWatchdog
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+class LoopWatchdogTestCase(unittest.TestCase):
+    def test_records_stall_with_blocking_stack(self):
+        async def scenario():
+            watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+            await watchdog.stop()
+            return watchdog.stats()
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["stalls"], 1)
+        self.assertGreaterEqual(stats["max_stall_ms"], 250)
+        self.assertIn("block_the_loop", stats["recent_stalls"][0]["stack"])
+
+    def test_no_stalls_when_loop_is_idle(self):
+        async def scenario():
+            watchdog = LoopWatchdog(threshold=0.2, interval=0.01)
+            watchdog.start()
+            await asyncio.sleep(0.1)
+            await watchdog.stop()
+            return watchdog.stats()
+
+        self.assertEqual(asyncio.run(scenario())["stalls"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import asyncio
 from typing import Any, Callable, Coroutine, List
 from functools import wraps
+import weakref
+from app.core.logging import logger
 
 def async_timed():
     def wrapper(func: Callable) -> Callable:
@@ -12,7 +14,7 @@ def async_timed():
             finally:
                 end = asyncio.get_event_loop().time()
                 total = end - start
-                print(f'{func.__name__} took {total:.2f} seconds')
+                logger.debug(f'{func.__name__} took {total:.2f} seconds')
         return wrapped
     return wrapper
 
@@ -34,4 +36,27 @@ async def gather_with_concurrency(n: int, timeout: int, *tasks) -> List[Any]:
     return await asyncio.gather(
         *(bounded_task(task) for task in tasks),
         return_exceptions=False
-    )
\ No newline at end of file
+    )
+
+class LoopLocalLock:
+    """
+    asyncio.Lock for state shared at class or module level. Each event loop gets its own
+    lock, since an asyncio.Lock can only be awaited from the loop it first waited on.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def __aenter__(self):
+        await self._lock().acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._lock().release()
@@ -0,0 +1,57 @@
+"""
+Compares memory and parse time of the raw REST Countries payload with CountryRecords.
+
+    python -m benchmarks.country_records [--input africa.json]
+
+Without --input the full payload is downloaded from settings.REST_COUNTRIES_URL.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import httpx
+from app.core.config import settings
+from app.services.countries import parse_countries
+
+def measure(label, parse, content, repeat=50):
+    gc.collect()
+    tracemalloc.start()
+    result = parse(content)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(content)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print(f"{label:<10} {len(content) / 1024:>9.1f} KiB body {retained / 1024:>9.1f} KiB retained {elapsed * 1000:>8.2f} ms parse")
+    return result
+
+def project(countries, fields):
+    """Emulate the upstream ?fields= filter on a full payload"""
+    return [{key: value for key, value in country.items() if key in fields} for country in countries]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", help="Saved full REST Countries response (JSON)")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            full_content = f.read()
+    else:
+        response = httpx.get(settings.REST_COUNTRIES_URL, timeout=settings.EXTERNAL_API_TIMEOUT)
+        response.raise_for_status()
+        full_content = response.content
+
+    fields = set(settings.REST_COUNTRIES_FIELDS.split(","))
+    projected_content = json.dumps(project(json.loads(full_content), fields)).encode("utf-8")
+
+    measure("before", json.loads, full_content)
+    records = measure("after", parse_countries, projected_content)
+    print(f"{len(records)} countries")
+
+if __name__ == "__main__":
+    main()
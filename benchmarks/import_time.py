@@ -0,0 +1,68 @@
+"""
+Reports where the time to import the app goes, from Python's -X importtime output.
+
+    python -m benchmarks.import_time [--module app.main] [--top 15] [--budget-ms 800]
+
+Each run is a fresh interpreter, so nothing is already imported. The total is the
+cumulative time of the module itself; with --budget-ms the exit status is 1 when it is
+over budget, so the report can gate a CI job.
+"""
+import argparse
+import subprocess
+import sys
+
+def import_times(module: str):
+    """[(depth, self_us, cumulative_us, name)] in the order Python reported them"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+def report(module: str, top: int):
+    rows = import_times(module)
+    total = next(cumulative for _, _, cumulative, name in reversed(rows) if name == module)
+    print(f"import {module}: {total / 1000:.1f} ms, {len(rows)} modules\n")
+
+    # Dependencies by the time their whole import took, counted where the app (or the
+    # interpreter) first imports them. Python lists a module's imports before the module,
+    # one level deeper, so a row's importer is the next row at a lower depth.
+    app_root = module.split(".")[0]
+    packages = {}
+    for i, (depth, _, cumulative, name) in enumerate(rows):
+        root = name.split(".")[0]
+        importer = next((row[3] for row in rows[i + 1:] if row[0] < depth), None)
+        if root != app_root and (importer is None or importer.split(".")[0] == app_root):
+            packages[root] = packages.get(root, 0) + cumulative
+    print(f"{'dependencies':<44}{'cumulative':>12}")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<42}{cumulative / 1000:>9.1f} ms")
+
+    # The app's own modules by the time spent in their top-level code
+    own = [row for row in rows if row[3].split(".")[0] == app_root]
+    print(f"\n{'app modules':<44}{'self':>12}{'cumulative':>12}")
+    for _, self_us, cumulative, name in sorted(own, key=lambda row: -row[2])[:top]:
+        print(f"  {name:<42}{self_us / 1000:>9.1f} ms{cumulative / 1000:>9.1f} ms")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="Fail when the import takes longer")
+    args = parser.parse_args()
+    total = report(args.module, args.top)
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        print(f"\nOver budget: {total / 1000:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
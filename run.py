@@ -1,22 +1,34 @@
-import uvicorn
 from app.main import app
 from app.middleware.logging_middleware import RequestLoggingMiddleware
-from app.core.logging import logger
+from app.core.config import settings
+from app.core.logging import logger, setup_logging
+from app.core.server import PreforkServer
+from app.services.refresh import DataRefresher
+from app.services.shared_dataset import shared_dataset
 
 # Add middleware
 app.add_middleware(RequestLoggingMiddleware)
 
 if __name__ == "__main__":
+    setup_logging()
     logger.info("Starting African Capitals API")
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        workers=4,  # Number of worker processes
-        limit_concurrency=100,  # Max concurrent connections
-        timeout_keep_alive=5,  # Keep-alive timeout
-        loop="uvloop",  # Faster event loop implementation
-        http="httptools",  # Faster HTTP protocol implementation
-        proxy_headers=True,
-        forwarded_allow_ips="*"
-    )
\ No newline at end of file
+    # Loads the datasets once and publishes them to shared memory; with more than one
+    # worker, a separate process keeps refreshing and republishing them
+    refresher = DataRefresher(settings.DATA_REFRESH_INTERVAL, shared=shared_dataset)
+    try:
+        PreforkServer(
+            app,
+            host="0.0.0.0",
+            port=8000,
+            workers=settings.WORKERS,  # Number of worker processes
+            warmup=refresher.warm,
+            background=refresher.run if settings.DATA_REFRESH_INTERVAL > 0 else None,
+            limit_concurrency=100,  # Max concurrent connections per worker
+            timeout_keep_alive=5,  # Keep-alive timeout
+            loop="auto",  # uvloop when installed
+            http="auto",  # httptools when installed
+            proxy_headers=True,
+            forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS
+        ).run()
+    finally:
+        shared_dataset.unlink_all()